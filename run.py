@@ -121,7 +121,7 @@ def main():
             logger.info("Plots up to date. Skipping generation.")
         else:
             logger.info("Generating visualizations...")
-            plot_metrics(df, output_dir=plot_dir, periods=plot_periods, use_imperial_units=use_imperial)
+            plot_metrics(df, output_dir=plot_dir, periods=plot_periods, use_imperial_units=use_imperial, workers=os.cpu_count() or 1)
 
         # ---------- Description ----------
         logger.info("Running summary analysis...")
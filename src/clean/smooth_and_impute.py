@@ -16,17 +16,46 @@ import pandas as pd
 import numpy as np
 from datetime import datetime
 from src.tools.energy import (
-    calculate_rmr,
-    calculate_age,
+    calculate_rmr_array,
+    calculate_age_array,
     estimate_caloric_imbalance
 )
 
+def _interpolate_time(series: pd.Series, limit: int) -> pd.Series:
+    """
+    Equivalent of series.interpolate(method="time", limit=limit, limit_direction="both")
+    for a DatetimeIndex-ed series, done as a single np.interp over int64 timestamps.
+    """
+    if series.index.hasnans:
+        # NaT would read as int64 min below; pandas refuses this case too
+        raise NotImplementedError(
+            "Interpolation with NaNs in the index has not been implemented. "
+            "Try filling those NaNs before interpolating."
+        )
+    y = series.to_numpy(dtype=np.float64, copy=True)
+    valid = ~np.isnan(y)
+    if valid.all() or not valid.any():
+        return pd.Series(y, index=series.index, name=series.name)
+
+    x = series.index.asi8
+    n = len(y)
+    pos = np.arange(n)
+    # positional distance to the nearest valid reading on either side
+    prev_valid = np.maximum.accumulate(np.where(valid, pos, -1))
+    next_valid = np.minimum.accumulate(np.where(valid, pos, n)[::-1])[::-1]
+    fill = ~valid & (
+        ((prev_valid >= 0) & (pos - prev_valid <= limit))
+        | ((next_valid < n) & (next_valid - pos <= limit))
+    )
+    y[fill] = np.interp(x[fill], x[valid], y[valid])
+    return pd.Series(y, index=series.index, name=series.name)
+
 def smooth_and_impute(df: pd.DataFrame, user_info: dict = None, span: int = 14) -> pd.DataFrame:
     if "date" not in df.columns:
         raise ValueError("Input DataFrame must include a 'date' column.")
     
     df = df.copy()
-    df["date"] = pd.to_datetime(df["date"], errors="coerce")
+    df["date"] = pd.to_datetime(df["date"], format="ISO8601", errors="coerce", cache=True)
     df = df.sort_values("date").set_index("date")
 
     dob = pd.to_datetime(user_info.get("dob", "1990-01-01")) if user_info else datetime(1990, 1, 1)
@@ -38,12 +67,11 @@ def smooth_and_impute(df: pd.DataFrame, user_info: dict = None, span: int = 14)
     target_metrics = [col for col in numeric_cols if col not in excluded_metrics]
 
     for col in target_metrics:
-        interpolated = df[col].interpolate(method="time", limit=span, limit_direction="both")
+        interpolated = _interpolate_time(df[col], limit=span)
         if col == "CaloriesIn":
             df["TrendCaloriesIn"] = interpolated
         elif col == "Weight":
             # Use centered 2-sided smoothing for Weight
-            interpolated = df["Weight"].interpolate(method="time", limit=span, limit_direction="both")
             df["TrendWeight"] = interpolated.rolling(window=21, center=True, min_periods=7).mean()
         else:
             df[f"Trend{col}"] = interpolated.ewm(span=span, adjust=False).mean()
@@ -76,12 +104,8 @@ def smooth_and_impute(df: pd.DataFrame, user_info: dict = None, span: int = 14)
         )
 
     # Age and RMR
-    df["Age"] = df.index.to_series().apply(lambda d: calculate_age(dob, d))
-    df["RMR"] = df.apply(
-        lambda row: calculate_rmr(row["TrendWeight"], row["Age"], sex)
-        if pd.notna(row["TrendWeight"]) else np.nan,
-        axis=1
-    )
+    df["Age"] = calculate_age_array(dob, df.index.to_numpy())
+    df["RMR"] = calculate_rmr_array(df["TrendWeight"].to_numpy(), df["Age"].to_numpy(), sex)
 
     # TDEE = max(CaloriesIn - EnergyBalance, RMR)
     df["TDEE_raw"] = df["TrendCaloriesIn"] - df["EnergyBalance"]
@@ -27,7 +27,7 @@ import pandas as pd
 import os
 import ast
 from src.tools.user_info import load_or_prompt_user_info
-from src.parse.parser import parse_health_metrics
+from src.parse.parser import parse_health_columns
 from src.clean.smooth_and_impute import smooth_and_impute
 
 # Configure logging
@@ -45,16 +45,14 @@ def main():
     xml_path = sys.argv[1] if len(sys.argv) > 1 else "data/export.xml"
     logger.info(f"Loading Apple Health export from: {xml_path}")
 
-    # Parse metrics
-    metrics = parse_health_metrics(xml_path)
-    if not metrics:
+    # Parse metrics straight into columns
+    columns = parse_health_columns(xml_path, workers=os.cpu_count() or 1)
+    if len(columns["date"]) == 0:
         logger.error("No metrics were parsed. Exiting.")
         return
 
     # Clean metrics
-    df = pd.DataFrame.from_dict(metrics, orient="index")
-    df.index.name = "date"
-    df = df.reset_index()
+    df = pd.DataFrame(columns)
     cleaned_df = smooth_and_impute(df, user_info=user_info, span=14)
 
     # Export cleaned metrics to CSV
@@ -9,19 +9,30 @@ aggregation (sum or average) for supported metrics.
 Metrics include: Weight, Lean Body Mass, Body Fat %, Calories, Steps, Distance, etc.
 """
 
-import xml.etree.ElementTree as ET
-from collections import defaultdict
 from config.constants import (
     TARGET_METRICS,
     SUM_METRICS,
     SOURCE_PRIORITY,
     LBS_TO_KG
 )
+import array
 import logging
 import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+import numpy as np
+from src.parse.sharding import iter_records, plan_shards, read_shard
 
 logger = logging.getLogger(__name__)
 
+# Stable integer ids for the columnar record buffers
+_METRIC_NAMES = list(dict.fromkeys(TARGET_METRICS.values()))
+_METRIC_IDS = {metric: i for i, metric in enumerate(_METRIC_NAMES)}
+
+# Mass metrics whose "lb" readings are converted to kg after parsing
+_MASS_METRIC_IDS = [_METRIC_IDS["Weight"], _METRIC_IDS["LeanBodyMass"]]
+_SUM_METRIC_IDS = [_METRIC_IDS[metric] for metric in SUM_METRICS]
+
 def get_source_priority(source: str, device: str) -> int:
     """
     Assigns priority to a data source. Apple Watch > iPhone > default (3 > 2 > 1).
@@ -32,24 +43,27 @@ def get_source_priority(source: str, device: str) -> int:
         return SOURCE_PRIORITY.get("iPhone", 1)
     return SOURCE_PRIORITY.get("default", 1)
 
-def parse_record(elem, weight_unit):
+def parse_record(elem):
     """
     Parses a single <Record> element to extract metric data.
 
+    The value is returned in the record's own unit; lb → kg conversion for
+    mass metrics is applied later to the whole value column at once.
+
     Returns:
-        tuple: (date_str, metric_name, (value, timestamp), priority, weight_unit)
+        tuple: (date_str, metric_name, (value, timestamp), priority, unit)
         or None if the element is invalid or irrelevant.
     """
-    r_type = elem.get("type")
-    if r_type not in TARGET_METRICS:
+    attrs = elem.attrib
+    r_type = attrs.get("type")
+    metric = TARGET_METRICS.get(r_type)  # single probe filters irrelevant types
+    if metric is None:
         return None
 
-    metric = TARGET_METRICS[r_type]
-    date_str = (elem.get("startDate") or "")[:10]
-    value_str = elem.get("value")
-    timestamp = elem.get("startDate") or ""
-    source = elem.get("sourceName") or ""
-    device = elem.get("device") or ""
+    # only relevant records pay for the remaining attribute reads
+    timestamp = attrs.get("startDate") or ""
+    value_str = attrs.get("value")
+    date_str = timestamp[:10]
 
     if not value_str or not date_str:
         return None
@@ -59,68 +73,255 @@ def parse_record(elem, weight_unit):
     except ValueError:
         return None
 
-    unit = elem.get("unit")
-    if r_type == "HKQuantityTypeIdentifierBodyMass":
-        if weight_unit is None and unit:
-            weight_unit = unit
-            logger.info(f"Detected weight unit: {weight_unit}")
-        if unit == "lb":
-            value *= LBS_TO_KG
-    elif r_type == "HKQuantityTypeIdentifierLeanBodyMass" and unit == "lb":
-        value *= LBS_TO_KG
-
+    unit = attrs.get("unit")
+    source = attrs.get("sourceName") or ""
+    device = attrs.get("device") or ""
     priority = get_source_priority(source, device)
-    return date_str, metric, (value, timestamp), priority, weight_unit
+    return date_str, metric, (value, timestamp), priority, unit
 
-def parse_health_metrics(xml_path: str) -> dict:
+def _aggregate_daily(dates, metrics, values, timestamps, priorities, n_dates):
     """
-    Parses the Apple Health export XML file and returns a dictionary of cleaned, daily metrics.
+    Vectorized daily reduction over the columnar record buffers.
 
-    Args:
-        xml_path (str): Path to Apple Health export XML file.
+    For every (date, metric) cell only the highest-priority source is kept,
+    duplicate (timestamp, value) readings are dropped, and the remaining
+    values are summed.
 
     Returns:
-        dict: {date: {metric: aggregated_value, ...}, ...}
+        tuple: (cell_keys, sums, counts) where cell_key = date_id * n_metrics + metric_id
+    """
+    n_metrics = len(_METRIC_NAMES)
+    keys = dates.astype(np.int64) * n_metrics + metrics
+
+    # keep only readings from the best source seen for each cell
+    best = np.zeros(n_dates * n_metrics, dtype=priorities.dtype)
+    np.maximum.at(best, keys, priorities)
+    keep = priorities == best[keys]
+    keys, timestamps, values = keys[keep], timestamps[keep], values[keep]
+
+    # sort by cell, then (timestamp, value) so duplicates become neighbours
+    order = np.lexsort((values, timestamps, keys))
+    keys, timestamps, values = keys[order], timestamps[order], values[order]
+    unique = np.ones(len(keys), dtype=bool)
+    unique[1:] = (
+        (keys[1:] != keys[:-1])
+        | (timestamps[1:] != timestamps[:-1])
+        | (values[1:] != values[:-1])
+    )
+    keys, values = keys[unique], values[unique]
+
+    # per-cell sum and count as two C-level segmented reductions
+    n_cells = n_dates * n_metrics
+    sums = np.bincount(keys, weights=values, minlength=n_cells)
+    counts = np.bincount(keys, minlength=n_cells)
+    cells = np.flatnonzero(counts)
+    return cells, sums[cells], counts[cells]
+
+def _first_seen_metrics(dates, metrics) -> np.ndarray:
+    """
+    Metric ids in the order a date-by-date walk of the records first meets them.
+
+    Dates are taken in first-seen order and, within a date, metrics in the
+    order of their first record, which is the column order a
+    {date: {metric: value}} dict yields.
+    """
+    # dates are numbered in first-seen order, so (date_id, record index)
+    # ranks every record along that walk
+    rank = dates.astype(np.int64) * len(metrics) + np.arange(len(metrics))
+    first = np.full(len(_METRIC_NAMES), np.iinfo(np.int64).max)
+    np.minimum.at(first, metrics, rank)
+    present = np.flatnonzero(first != np.iinfo(np.int64).max)
+    return present[np.argsort(first[present], kind="stable")]
+
+def _read_records(source) -> dict:
+    """
+    Streams <Record> elements from *source* (a path or file-like object) into
+    columnar buffers.
+
+    Returns:
+        dict: numpy id/value columns ("date_ids", "metric_ids", "values",
+        "timestamp_ids", "priorities", "unit_ids") plus the interned "dates",
+        "timestamps" and "units" lists those ids index into.
+    """
+    timestamp_ids = {}
+    unit_ids = {}
+    # contiguous typed buffers: no per-value float objects or list growth
+    rec_metrics = array.array("b")
+    rec_values = array.array("d")
+    rec_timestamps = array.array("i")
+    rec_priorities = array.array("b")
+    rec_units = array.array("h")
+    # lxml filters to <Record> end events in C, so no start events or tag checks
+    for idx, elem in enumerate(iter_records(source)):
+        result = parse_record(elem)
+        if result is not None:
+            _, metric, (value, timestamp), priority, unit = result
+
+            rec_metrics.append(_METRIC_IDS[metric])
+            rec_values.append(value)
+            rec_timestamps.append(timestamp_ids.setdefault(timestamp, len(timestamp_ids)))
+            rec_priorities.append(priority)
+            rec_units.append(unit_ids.setdefault(unit, len(unit_ids)))
+
+        if idx % 1_000_000 == 0 and idx > 0:
+            logger.info(f"Parsed {idx:,} records...")
+
+    # dates are derived once per distinct timestamp rather than per record;
+    # timestamp ids are in first-seen order, so the date order is unchanged
+    date_ids = {}
+    ts_dates = np.array(
+        [date_ids.setdefault(ts[:10], len(date_ids)) for ts in timestamp_ids],
+        dtype=np.intc,
+    )
+    rec_ts = np.frombuffer(rec_timestamps, dtype=np.intc)
+
+    return {
+        "dates": list(date_ids),
+        "timestamps": list(timestamp_ids),
+        "units": list(unit_ids),
+        "date_ids": ts_dates[rec_ts] if len(ts_dates) else rec_ts,
+        "metric_ids": np.frombuffer(rec_metrics, dtype=np.int8),
+        "values": np.frombuffer(rec_values, dtype=np.float64),
+        "timestamp_ids": rec_ts,
+        "priorities": np.frombuffer(rec_priorities, dtype=np.int8),
+        "unit_ids": np.frombuffer(rec_units, dtype=np.int16),
+    }
+
+def _merge_shards(parts: list) -> dict:
+    """
+    Concatenates per-shard buffers, remapping shard-local date, timestamp and
+    unit ids onto shared ones so priority and dedup work across shards.
+    """
+    date_ids = {}
+    unit_ids = {}
+    all_timestamps = [ts for part in parts for ts in part["timestamps"]]
+    _, ts_global = np.unique(np.asarray(all_timestamps, dtype=str), return_inverse=True)
+
+    date_cols, ts_cols, unit_cols = [], [], []
+    offset = 0
+    for part in parts:
+        date_map = np.array([date_ids.setdefault(d, len(date_ids)) for d in part["dates"]], dtype=np.intc)
+        unit_map = np.array([unit_ids.setdefault(u, len(unit_ids)) for u in part["units"]], dtype=np.int16)
+        ts_map = ts_global[offset:offset + len(part["timestamps"])].astype(np.intc)
+        offset += len(part["timestamps"])
+        date_cols.append(date_map[part["date_ids"]] if len(date_map) else part["date_ids"])
+        ts_cols.append(ts_map[part["timestamp_ids"]] if len(ts_map) else part["timestamp_ids"])
+        unit_cols.append(unit_map[part["unit_ids"]] if len(unit_map) else part["unit_ids"])
+
+    return {
+        "dates": list(date_ids),
+        "units": list(unit_ids),
+        "date_ids": np.concatenate(date_cols),
+        "metric_ids": np.concatenate([part["metric_ids"] for part in parts]),
+        "values": np.concatenate([part["values"] for part in parts]),
+        "timestamp_ids": np.concatenate(ts_cols),
+        "priorities": np.concatenate([part["priorities"] for part in parts]),
+        "unit_ids": np.concatenate(unit_cols),
+    }
+
+def _parse_daily_cells(xml_path: str, workers: int = 1):
+    """
+    Streams the export into columnar record buffers and reduces them to daily cells.
+
+    Exports larger than MIN_SHARD_BYTES are split at <Record> boundaries and
+    parsed in up to *workers* processes when workers > 1.
+
+    Returns:
+        tuple: (dates, cells, daily, metric_order) where dates lists the date
+        strings by id, cells holds date_id * n_metrics + metric_id for every
+        populated cell, daily holds the matching summed or averaged value and
+        metric_order lists the parsed metric ids in first-seen order.
     """
     if not os.path.exists(xml_path):
         raise FileNotFoundError(f"File not found: {xml_path}")
 
     logger.info(f"Parsing health metrics from {xml_path}...")
-    temp = defaultdict(lambda: defaultdict(lambda: {"priority": 0, "seen": set(), "values": []}))
-    weight_unit = None
-    context = ET.iterparse(xml_path, events=("start", "end"))
-    _, root = next(context)
-
-    for idx, (event, elem) in enumerate(context):
-        if event == "end" and elem.tag == "Record":
-            result = parse_record(elem, weight_unit)
-            if result is None:
-                elem.clear()
-                continue
-            date, metric, (value, timestamp), priority, weight_unit = result
-
-            record_key = (timestamp, value)
-            slot = temp[date][metric]
-
-            if priority > slot["priority"]:
-                temp[date][metric] = {"priority": priority, "seen": {record_key}, "values": [value]}
-            elif priority == slot["priority"] and record_key not in slot["seen"]:
-                slot["seen"].add(record_key)
-                slot["values"].append(value)
-
-            elem.clear()
+    shards = plan_shards(xml_path, workers)
 
-        if idx % 1_000_000 == 0 and idx > 0:
-            logger.info(f"Parsed {idx:,} records...")
+    if len(shards) > 1:
+        logger.info(f"Parsing in {len(shards)} shards...")
+        with ProcessPoolExecutor(max_workers=len(shards)) as pool:
+            records = _merge_shards(list(pool.map(partial(read_shard, _read_records), shards)))
+    else:
+        records = _read_records(xml_path)
+
+    if not len(records["values"]):
+        logger.info("Finished parsing 0 unique dates.")
+        return [], np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float64), np.empty(0, dtype=np.int64)
+
+    metrics = records["metric_ids"]
+    values = records["values"]
+    # the unit is reported once from the columns rather than checked per record
+    weight_rows = np.flatnonzero(metrics == _METRIC_IDS["Weight"])
+    if len(weight_rows):
+        weight_unit = records["units"][records["unit_ids"][weight_rows[0]]]
+        if weight_unit:
+            logger.info(f"Detected weight unit: {weight_unit}")
+    if "lb" in records["units"]:
+        # one masked multiply instead of a unit check per record
+        lb_id = records["units"].index("lb")
+        lb = (records["unit_ids"] == lb_id) & np.isin(metrics, _MASS_METRIC_IDS)
+        values[lb] *= LBS_TO_KG
+
+    cells, sums, counts = _aggregate_daily(
+        records["date_ids"],
+        metrics,
+        values,
+        records["timestamp_ids"],
+        records["priorities"],
+        len(records["dates"]),
+    )
+
+    is_sum = np.isin(cells % len(_METRIC_NAMES), _SUM_METRIC_IDS)
+    daily = np.where(is_sum, sums, sums / counts)
+
+    metric_order = _first_seen_metrics(records["date_ids"], metrics)
+
+    logger.info(f"Finished parsing {len(records['dates'])} unique dates.")
+    return records["dates"], cells, daily, metric_order
+
+def parse_health_columns(xml_path: str, workers: int = 1) -> dict:
+    """
+    Parses the Apple Health export XML file into column arrays ready for a DataFrame.
+
+    Args:
+        xml_path (str): Path to Apple Health export XML file.
+        workers (int): Number of processes to parse large exports with.
+
+    Returns:
+        dict: {"date": ndarray[str], metric: ndarray[float64], ...}, one entry per
+        day, with metrics in the order they first appear in the export; days
+        without a reading for a metric are NaN.
+    """
+    dates, cells, daily, metric_order = _parse_daily_cells(xml_path, workers)
+    n_metrics = len(_METRIC_NAMES)
+
+    # cell keys are row-major (date_id, metric_id) offsets into this matrix
+    matrix = np.full((len(dates), n_metrics), np.nan)
+    matrix.reshape(-1)[cells] = daily
 
+    columns = {"date": np.asarray(dates, dtype=object)}
+    for metric_id in metric_order.tolist():
+        columns[_METRIC_NAMES[metric_id]] = matrix[:, metric_id]
+    return columns
+
+def parse_health_metrics(xml_path: str) -> dict:
+    """
+    Parses the Apple Health export XML file and returns a dictionary of cleaned, daily metrics.
+
+    Records are buffered column-wise while streaming and reduced to daily
+    values in a single vectorized pass once the XML has been read.
+
+    Args:
+        xml_path (str): Path to Apple Health export XML file.
+
+    Returns:
+        dict: {date: {metric: aggregated_value, ...}, ...}
+    """
+    dates, cells, daily, _ = _parse_daily_cells(xml_path)
+    n_metrics = len(_METRIC_NAMES)
     final = {}
-    for date, metrics in temp.items():
-        daily = {}
-        for metric, data in metrics.items():
-            values = data["values"]
-            daily[metric] = sum(values) if metric in SUM_METRICS else sum(values) / len(values)
-        if daily:
-            final[date] = daily
-
-    logger.info(f"Finished parsing {len(final)} unique dates.")
-    return final
\ No newline at end of file
+    for cell, value in zip(cells.tolist(), daily.tolist()):
+        date_id, metric_id = divmod(cell, n_metrics)
+        final.setdefault(dates[date_id], {})[_METRIC_NAMES[metric_id]] = value
+    return final
@@ -0,0 +1,168 @@
+# src/parse/sharding.py
+"""
+Byte-range sharding helpers for large Apple Health exports.
+
+An export is split at <Record> start tags so each shard holds only whole
+records. A shard is exposed as a small file-like object wrapped in a
+synthetic <HealthData> root, which lets lxml's iterparse consume it
+directly in a worker process without writing temporary files.
+"""
+
+import os
+
+from lxml import etree as ET
+
+RECORD_MARKER = b"<Record "
+# Exports smaller than this are parsed in-process even when workers > 1
+MIN_SHARD_BYTES = 64 * 1024 * 1024
+# Top-level elements that can wrap <Record> children (e.g. food/blood-pressure
+# correlations); a shard must never start inside one of them.
+CONTAINER_TAG = b"Correlation"
+_OPEN_TAG = b"<" + CONTAINER_TAG
+_CLOSE_TAG = b"</" + CONTAINER_TAG + b">"
+_SCAN_BLOCK = 1 << 20
+
+
+def _find(f, pos: int, size: int, needle: bytes):
+    """Offset of the first *needle* at or after *pos*, or None."""
+    while pos < size:
+        f.seek(pos)
+        block = f.read(_SCAN_BLOCK)
+        hit = block.find(needle)
+        if hit >= 0:
+            return pos + hit
+        if len(block) < _SCAN_BLOCK:
+            return None
+        # overlap so a needle straddling two blocks is not missed
+        pos += len(block) - len(needle) + 1
+    return None
+
+
+def _inside_container(f, pos: int, floor: int = 0) -> bool:
+    """
+    True when byte offset *pos* falls inside an open <Correlation> element.
+
+    Scans backward from *pos* to the nearest Correlation open or close tag,
+    however far away it is; *floor* is an offset known to be outside any
+    container (the previous boundary), so the scan never goes past it.
+    """
+    end = pos
+    while end > floor:
+        start = max(floor, end - _SCAN_BLOCK)
+        f.seek(start)
+        # overlap so a tag straddling two blocks is not missed
+        window = f.read(min(pos, end + len(_CLOSE_TAG) - 1) - start)
+        opened, closed = window.rfind(_OPEN_TAG), window.rfind(_CLOSE_TAG)
+        if opened >= 0 or closed >= 0:
+            return opened > closed
+        end = start
+    return False
+
+
+def _next_boundary(f, pos: int, size: int, marker: bytes, floor: int = 0):
+    """Offset of the first top-level *marker* at or after *pos*, or None."""
+    while True:
+        found = _find(f, pos, size, marker)
+        if found is None or not _inside_container(f, found, floor):
+            return found
+        # skip the rest of the enclosing container in one step
+        close = _find(f, found, size, _CLOSE_TAG)
+        if close is None:
+            return None
+        pos = floor = close + len(_CLOSE_TAG)
+
+
+def iter_records(source):
+    """
+    Yields every <Record> element of *source* (a path or file-like object).
+
+    Each element, and the already-processed siblings the root still holds,
+    is freed once the caller moves on, so memory stays flat on large exports.
+    huge_tree lifts libxml2's input-size limits, which multi-GB exports hit.
+    """
+    # only <Record> end events cross into Python
+    context = ET.iterparse(source, events=("end",), tag="Record", huge_tree=True)
+    for _, elem in context:
+        yield elem
+
+        elem.clear()
+        while elem.getprevious() is not None:
+            del elem.getparent()[0]
+
+
+def shard_ranges(path: str, n: int, marker: bytes = RECORD_MARKER) -> list[tuple[int, int]]:
+    """
+    Splits *path* into at most *n* contiguous [start, end) byte ranges.
+
+    Every range after the first starts exactly at a top-level occurrence of
+    *marker*, so no record or correlation is cut in half. Fewer ranges are
+    returned when the file has too few markers to go around.
+    """
+    size = os.path.getsize(path)
+    starts = [0]
+    with open(path, "rb") as f:
+        for i in range(1, n):
+            found = _next_boundary(f, max(i * size // n, starts[-1] + 1), size, marker, starts[-1])
+            if found is None:
+                break
+            starts.append(found)
+    return list(zip(starts, starts[1:] + [size]))
+
+
+def plan_shards(path: str, workers: int) -> list[tuple[str, int, int]]:
+    """
+    (path, start, end) shards for parsing *path* in *workers* processes.
+
+    Returns an empty list when workers <= 1 or the export is smaller than
+    MIN_SHARD_BYTES; callers then parse the whole file in-process.
+    """
+    if workers <= 1 or os.path.getsize(path) < MIN_SHARD_BYTES:
+        return []
+    return [(path, start, end) for start, end in shard_ranges(path, workers)]
+
+
+def read_shard(read_fn, shard: tuple):
+    """Process-pool entry point: run *read_fn* over one (path, start, end) byte range."""
+    path, start, end = shard
+    with ShardReader(path, start, end) as reader:
+        return read_fn(reader)
+
+
+class ShardReader:
+    """
+    Read-only file-like view over bytes [start, end) of an export.
+
+    Shards that do not begin at the start of the file get an opening
+    <HealthData> tag, and shards that stop before EOF get a closing one, so
+    each shard parses as a standalone document.
+    """
+
+    def __init__(self, path: str, start: int, end: int):
+        self._file = open(path, "rb")
+        self._file.seek(start)
+        self._remaining = end - start
+        self._prefix = b"<HealthData>" if start > 0 else b""
+        self._suffix = b"</HealthData>" if end < os.path.getsize(path) else b""
+
+    def read(self, size: int = -1) -> bytes:
+        if self._prefix:
+            out, self._prefix = self._prefix, b""
+            return out
+        if self._remaining > 0:
+            n = self._remaining if size is None or size < 0 else min(size, self._remaining)
+            data = self._file.read(n)
+            self._remaining -= len(data)
+            if data:
+                return data
+            self._remaining = 0
+        out, self._suffix = self._suffix, b""
+        return out
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
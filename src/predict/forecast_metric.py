@@ -14,13 +14,17 @@ Author: Lincoln Quick
 from __future__ import annotations
 
 from datetime import datetime, timedelta
-from typing import List, Dict, Tuple
+from typing import List, Dict, NamedTuple, Tuple
 
+import numpy as np
 import pandas as pd
 from xgboost import XGBRegressor
 from sklearn.metrics import r2_score
 
-from src.tools.energy import calculate_rmr, calculate_age
+from src.tools.energy import (
+    calculate_rmr, calculate_rmr_array, calculate_age_array
+)
+from src.tools.memo import BoundedCache, frame_digest
 
 
 # ────────────────────────────────────────────────────────────────────────────
@@ -28,41 +32,96 @@ from src.tools.energy import calculate_rmr, calculate_age
 # ────────────────────────────────────────────────────────────────────────────
 def estimate_rmr_adaptation(
     weight_start: float, age_start: float,
-    weight_now: float,   age_now: float,
+    weight_now,          age_now,
     sex: str
-) -> float:
-    """Return fractional drop in RMR (clamped 0-1) between start and now."""
+):
+    """
+    Return fractional drop in RMR (clamped 0-1) between start and now.
+
+    *weight_now* / *age_now* may be arrays (one entry per horizon); an
+    undefined ratio counts as no adaptation.
+    """
     rmr_start = calculate_rmr(weight_start, age_start, sex)
-    rmr_now   = calculate_rmr(weight_now,   age_now,   sex)
+    rmr_now   = calculate_rmr_array(weight_now, age_now, sex)
     adapt = 1.0 - (rmr_now / rmr_start)
-    return max(0.0, min(adapt, 1.0))
+    return np.nan_to_num(np.clip(adapt, 0.0, 1.0), nan=0.0)
 
 
-# ────────────────────────────────────────────────────────────────────────────
-# 2. Main forecasting routine
-# ────────────────────────────────────────────────────────────────────────────
-def forecast_metric(
-    df: pd.DataFrame,
-    target_metric: str,
-    forecast_days: List[int],
-    dob: datetime,
-    sex: str,
-    window: int = 21,
-    top_n_features: int = 5
-) -> Tuple[Dict[int, float], List[str], float]:
+def _corr_with(M: np.ndarray, d: np.ndarray) -> np.ndarray:
     """
-    Predict *Trend<target_metric>* for the day offsets in *forecast_days*.
+    Pearson correlation of every column of *M* with *d*.
 
-    Returns
-    -------
-    predictions : {day_offset: value}
-    top_features : list of column names used by the model
-    r2 : training-set coefficient of determination
+    Same pairwise-complete NaN handling as DataFrame.corr(), but only the
+    K target correlations are computed instead of the full K×K matrix.
     """
-    # ── sanity & preprocessing ───────────────────────────────────────────
-    if "date" not in df.columns:
-        raise ValueError("DataFrame must contain a 'date' column.")
+    valid = ~np.isnan(M) & ~np.isnan(d)[:, None]
+    n = valid.sum(axis=0)
+    Mv = np.where(valid, M, 0.0)
+    dv = np.where(valid, d[:, None], 0.0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        Mc = np.where(valid, Mv - Mv.sum(axis=0) / n, 0.0)
+        dc = np.where(valid, dv - dv.sum(axis=0) / n, 0.0)
+        # column-wise dot products without N×K product temporaries
+        cov = np.einsum("ij,ij->j", Mc, dc)
+        corr = cov / np.sqrt(np.einsum("ij,ij->j", Mc, Mc) * np.einsum("ij,ij->j", dc, dc))
+    corr[~np.isfinite(corr)] = np.nan
+    return np.clip(corr, -1.0, 1.0)
+
+
+def _rolling_mean(X: np.ndarray, window: int) -> np.ndarray:
+    """
+    Trailing *window*-row mean of every column of *X* in one cumulative-sum
+    sweep. Like DataFrame.rolling(window).mean(), a row is NaN unless all
+    *window* values ending there are present.
+    """
+    present = ~np.isnan(X)
+    sums = np.zeros((len(X) + 1, X.shape[1]))
+    counts = np.zeros((len(X) + 1, X.shape[1]), dtype=np.int64)
+    np.cumsum(np.where(present, X, 0.0), axis=0, out=sums[1:])
+    np.cumsum(present, axis=0, out=counts[1:])
+
+    out = np.full(X.shape, np.nan)
+    if len(X) >= window:
+        full = (counts[window:] - counts[:-window]) == window
+        out[window - 1:] = np.where(full, (sums[window:] - sums[:-window]) / window, np.nan)
+    return out
+
+
+def _fit_model(X: pd.DataFrame, y: pd.Series) -> Tuple[XGBRegressor, float]:
+    """Fit an XGBRegressor and return it with its training-set R²."""
+    # histogram splits on all cores; other hyper-parameters stay at the
+    # library defaults so forecasts do not shift
+    model = XGBRegressor(tree_method="hist", n_jobs=-1)
+    model.fit(X, y)
+    return model, r2_score(y, model.predict(X))
+
+
+class _ForecastState(NamedTuple):
+    top_features: List[str]
+    r2: float
+    base_delta: float
+    now_val: float
+    last_dt: pd.Timestamp
+    peak_wt: float
+    peak_age: float
+
 
+# Fitted forecast state keyed by frame content and arguments, so repeated
+# calls (other horizons, GUI slider moves) skip feature building and the
+# model fit entirely.
+_FORECAST_CACHE_SIZE = 16
+_FORECAST_CACHE: Dict[tuple, _ForecastState] = BoundedCache(_FORECAST_CACHE_SIZE)
+
+
+def _fit_forecast_state(
+    df: pd.DataFrame,
+    target_metric: str,
+    dob: datetime,
+    sex: str,
+    window: int,
+    top_n_features: int
+) -> _ForecastState:
+    """Select features, fit the model and snapshot everything the horizon loop needs."""
     df = df.sort_values("date").copy()
     trend_target = f"Trend{target_metric}"
     if trend_target not in df.columns:
@@ -71,9 +130,9 @@ def forecast_metric(
     delta_target = f"{trend_target}_Delta"
 
     # ── basic cleaning / domain rules ────────────────────────────────────
-    df["TrendCaloriesIn"] = df["TrendCaloriesIn"].clip(lower=1250)
-    df["Age"]  = df["date"].apply(lambda d: calculate_age(dob, d))
-    df["RMR"]  = df.apply(lambda r: calculate_rmr(r["TrendWeight"], r["Age"], sex), axis=1)
+    df["TrendCaloriesIn"] = np.maximum(df["TrendCaloriesIn"].to_numpy(dtype=np.float64), 1250)
+    df["Age"]  = calculate_age_array(dob, df["date"].to_numpy())
+    df["RMR"]  = calculate_rmr_array(df["TrendWeight"].to_numpy(), df["Age"].to_numpy(), sex)
     df[delta_target] = df[trend_target].diff(window)
 
     # ── feature selection ────────────────────────────────────────────────
@@ -87,52 +146,102 @@ def forecast_metric(
         and df[col].dtype.kind in num_kinds                                 # ★ filter applied
     ]
 
-    corr = df[candidate_features + [delta_target]].corr()
-    best = (corr[delta_target]
-            .drop(index=delta_target)
+    # one contiguous block of the candidate columns, shared by the
+    # correlation pass and the design matrix below
+    trends = np.ascontiguousarray(df[candidate_features].to_numpy(dtype=np.float64))
+    col_index = {col: i for i, col in enumerate(candidate_features)}
+
+    corr = _corr_with(trends, df[delta_target].to_numpy(dtype=np.float64))
+    best = (pd.Series(corr, index=candidate_features)
             .abs()
             .sort_values(ascending=False)
             .head(top_n_features))
     top_features = best.index.tolist()
 
     # ── design matrix ────────────────────────────────────────────────────
-    F = df[top_features].rolling(window).mean()
-    F[f"Recent{target_metric}"] = df[trend_target].shift(1)
-    aligned = F.dropna().join(df[delta_target].dropna(), how="inner")
-
-    X = aligned[top_features + [f"Recent{target_metric}"]]
-    y = aligned[delta_target]
+    rolled = _rolling_mean(trends[:, [col_index[col] for col in top_features]], window)
+    target_vals = df[trend_target].to_numpy(dtype=np.float64)
+    recent = np.empty_like(target_vals)
+    recent[:1] = np.nan
+    recent[1:] = target_vals[:-1]
+    design = np.column_stack([rolled, recent])
+    deltas = df[delta_target].to_numpy(dtype=np.float64)
+
+    # rows where every feature and the delta are present: one mask in place
+    # of a dropna over the feature frame plus an inner join on the index
+    valid = ~np.isnan(design).any(axis=1) & ~np.isnan(deltas)
+    X = pd.DataFrame(design[valid], columns=top_features + [f"Recent{target_metric}"])
+    y = pd.Series(deltas[valid], name=delta_target)
 
     # ── model fit ────────────────────────────────────────────────────────
-    model = XGBRegressor()
-    model.fit(X, y)
-    r2 = r2_score(y, model.predict(X))
+    model, r2 = _fit_model(X, y)
 
     # ── recent snapshot for inference ────────────────────────────────────
-    last_row = F.iloc[-1].copy()
-    last_row[f"Recent{target_metric}"] = df[trend_target].iloc[-2]
-    X_live = last_row[top_features + [f"Recent{target_metric}"]].to_frame().T
+    # assembled straight into the float32 row the booster consumes
+    live = np.empty((1, len(top_features) + 1), dtype=np.float32)
+    live[0, :-1] = rolled[-1]
+    live[0, -1] = df[trend_target].iat[-2]
     now_val  = df[trend_target].iloc[-1]
     last_dt  = df["date"].iloc[-1]
 
     # baseline for adaptation
-    idx_peak   = df["TrendWeight"].expanding().max().idxmax()
+    # the running max first reaches its top at the first global maximum
+    idx_peak   = int(np.nanargmax(df["TrendWeight"].to_numpy(dtype=np.float64)))
     peak_wt    = df["TrendWeight"].iloc[idx_peak]
     peak_age   = df["Age"].iloc[idx_peak]
 
-    # ── iterative forecasting loop ───────────────────────────────────────
-    preds: Dict[int, float] = {}
-    for d in forecast_days:
-        # straight XGB delta extrapolated to horizon
-        raw_delta   = model.predict(X_live)[0] * (d / window)
+    # ── live delta ───────────────────────────────────────────────────────
+    # the snapshot is the same for every horizon, so predict it once; a
+    # contiguous float32 row skips the sklearn wrapper's pandas inspection
+    # and DMatrix construction
+    base_delta = float(model.get_booster().inplace_predict(live)[0])
+    return _ForecastState(top_features, r2, base_delta, now_val, last_dt, peak_wt, peak_age)
+
+
+# ────────────────────────────────────────────────────────────────────────────
+# 2. Main forecasting routine
+# ────────────────────────────────────────────────────────────────────────────
+def forecast_metric(
+    df: pd.DataFrame,
+    target_metric: str,
+    forecast_days: List[int],
+    dob: datetime,
+    sex: str,
+    window: int = 21,
+    top_n_features: int = 5
+) -> Tuple[Dict[int, float], List[str], float]:
+    """
+    Predict *Trend<target_metric>* for the day offsets in *forecast_days*.
+
+    Returns
+    -------
+    predictions : {day_offset: value}
+    top_features : list of column names used by the model
+    r2 : training-set coefficient of determination
+    """
+    # ── sanity & preprocessing ───────────────────────────────────────────
+    if "date" not in df.columns:
+        raise ValueError("DataFrame must contain a 'date' column.")
+
+    # ── fitted state (memoized on frame content + arguments) ─────────────
+    key = (frame_digest(df), target_metric, sex, pd.Timestamp(dob), window, top_n_features)
+    state = _FORECAST_CACHE.get(key)
+    if state is None:
+        state = _fit_forecast_state(df, target_metric, dob, sex, window, top_n_features)
+        _FORECAST_CACHE[key] = state
+    top_features, r2, base_delta, now_val, last_dt, peak_wt, peak_age = state
+
+    # ── horizon forecasts (all horizons at once) ─────────────────────────
+    days = np.asarray(forecast_days, dtype=np.float64)
+    future_ages = calculate_age_array(dob, [last_dt + timedelta(days=d) for d in forecast_days])
+
+    # straight XGB delta extrapolated to each horizon
+    raw_delta = base_delta * (days / window)
 
-        # metabolic adaptation dampening
-        future_dt   = last_dt + timedelta(days=d)
-        future_age  = calculate_age(dob, future_dt)
-        future_wt   = now_val + raw_delta
-        adapt       = estimate_rmr_adaptation(peak_wt, peak_age, future_wt, future_age, sex)
-        adj_delta   = raw_delta * (1 - adapt)
+    # metabolic adaptation dampening
+    adapt = estimate_rmr_adaptation(peak_wt, peak_age, now_val + raw_delta, future_ages, sex)
 
-        preds[d] = now_val + adj_delta
+    pred_vals = now_val + raw_delta * (1 - adapt)
 
-    return preds, top_features, r2
\ No newline at end of file
+    preds: Dict[int, float] = dict(zip(forecast_days, pred_vals.tolist()))
+    return preds, list(top_features), r2
\ No newline at end of file
@@ -8,6 +8,7 @@ This module includes:
 - Resting Metabolic Rate (RMR) calculation using the Livingston-Kohlstadt formula
 - Caloric imbalance estimation based on changes in fat and lean mass
 - Precise age calculation in years from date of birth to a target date
+- Array versions of the RMR and age calculations for whole date/weight columns
 
 Intended for use in model prediction, analysis, and personalization tools.
 
@@ -16,6 +17,8 @@ Author: Lincoln Quick
 
 from datetime import datetime
 
+import numpy as np
+
 # Constants from Thomas et al. (2010)
 CL = 1020  # kcal/kg for fat-free mass (lean)
 CF = 9500  # kcal/kg for fat mass
@@ -57,6 +60,40 @@ def calculate_age(dob: datetime, target_date: datetime) -> float:
     delta_days = (target_date - dob).days
     return delta_days / 365.25
 
+def calculate_rmr_array(weights, ages, sex: str, a: float = 0) -> np.ndarray:
+    """
+    Vectorized calculate_rmr over arrays of weights and ages.
+
+    Parameters:
+        weights (array-like): Weights in kg
+        ages (array-like): Ages in years
+        sex (str): 'male' or 'female'
+        a (float): Optional metabolic adaptation factor (0 ≤ a ≤ 1)
+
+    Returns:
+        np.ndarray: RMR in kcal/day (NaN where the weight or age is NaN)
+    """
+    c, p, y = RMR[sex].values()
+    weights = np.asarray(weights, dtype=np.float64)
+    ages = np.asarray(ages, dtype=np.float64)
+    rmr = (1 - a) * c * np.power(np.maximum(weights, 0), p) - y * ages
+    return np.maximum(rmr, 0)
+
+def calculate_age_array(dob: datetime, dates) -> np.ndarray:
+    """
+    Vectorized calculate_age over an array of dates.
+
+    Parameters:
+        dob (datetime): Date of birth
+        dates (array-like): Dates to calculate age at
+
+    Returns:
+        np.ndarray: Ages in years, using whole elapsed days like calculate_age
+        (NaN for missing dates)
+    """
+    delta = np.asarray(dates, dtype="datetime64[ns]") - np.datetime64(dob, "ns")
+    return np.floor(delta / np.timedelta64(1, "D")) / 365.25
+
 def estimate_caloric_imbalance(delta_fm: float, delta_ffm: float) -> float:
     """
     Estimate the caloric imbalance required to achieve given changes in mass.
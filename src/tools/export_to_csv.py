@@ -3,7 +3,7 @@ CSV Exporter for FitAssist AI
 
 This module provides a function to export cleaned or parsed Apple Health metrics
 to a CSV file. It accepts a dictionary in the format {date: {metric: value}} and
-converts it into a DataFrame sorted by date.
+streams it to disk one date row at a time, sorted by date.
 
 Features:
 - Automatically creates the output directory if it doesn't exist.
@@ -12,7 +12,7 @@ Features:
 
 Used in preprocessing and analysis pipelines to persist metric data in human-readable format.
 """
-import pandas as pd
+import csv
 import logging
 import os
 
@@ -37,21 +37,28 @@ def export_metrics_to_csv(data: dict, output_dir: str = "output") -> str:
 
     os.makedirs(output_dir, exist_ok=True)
 
-    # Convert to DataFrame
-    df = pd.DataFrame.from_dict(data, orient="index")
-    df.index.name = "date"
-    df = df.sort_index()
-    df.reset_index(inplace=True)
+    dates = sorted(data)
+    metrics = list(dict.fromkeys(m for row in data.values() for m in row))
 
     # Generate filename
-    start_date = df["date"].min()
-    end_date = df["date"].max()
+    start_date = dates[0]
+    end_date = dates[-1]
     filename = f"metrics_for_{start_date}_to_{end_date}.csv"
     output_path = os.path.join(output_dir, filename)
 
-    # Write CSV
-    df.to_csv(output_path, index=False)
+    # Stream rows straight from the dict; missing or NaN cells are left empty
+    # and values are written as floats, matching the former DataFrame.to_csv
+    with open(output_path, "w", newline="", buffering=1 << 20) as f:
+        writer = csv.writer(f, lineterminator="\n")
+        writer.writerow(["date", *metrics])
+        for date in dates:
+            row = data[date]
+            writer.writerow([date, *(
+                "" if (v := row.get(m)) is None or v != v else float(v)
+                for m in metrics
+            )])
+
     logger.info(f"Exported metrics to {output_path}")
-    logger.debug(f"First few rows:\n{df.head()}")
+    logger.debug(f"Wrote {len(dates)} rows x {len(metrics)} metrics")
 
-    return output_path
\ No newline at end of file
+    return output_path
@@ -1,8 +1,9 @@
 # src/tools/forecast_helpers.py
 
+import numpy as np
 import pandas as pd
 from datetime import timedelta
-from src.tools.energy import calculate_age, calculate_rmr
+from src.tools.energy import calculate_rmr, calculate_age_array, calculate_rmr_array
 
 def derive_dependent_metrics(weight, body_fat_percentage, age, sex):
     lean_mass = weight * (1 - body_fat_percentage)
@@ -35,11 +36,12 @@ def format_forecast_results(forecast: dict, df, target_metric: str, dob, sex: st
     base_weight = float(latest_row["TrendWeight"])
     body_fat_percentage = float(latest_row["TrendBodyFatPercentage"])
 
-    for day_offset, predicted_value in forecast.items():
+    # ages for every horizon in one pass
+    ages = calculate_age_array(dob, [latest_date + timedelta(days=d) for d in forecast])
+
+    for (day_offset, predicted_value), age in zip(forecast.items(), ages.tolist()):
         try:
             predicted_value = float(predicted_value)
-            forecast_date = latest_date + timedelta(days=day_offset)
-            age = calculate_age(dob, forecast_date)
             used_weight = predicted_value if target_metric == "Weight" else base_weight
 
             derived = derive_dependent_metrics(
@@ -77,33 +79,32 @@ def batch_derive_dependent_metrics(
     Compute derived metrics (RMR, LeanBodyMass, FatMass) for each forecasted day.
     """
     last_known = df.iloc[-1]
-    results = {}
-
-    for day, val in forecast_dict.items():
-        if target_metric == "Weight":
-            weight = val
-            bf = last_known["TrendBodyFatPercentage"]
-        elif target_metric == "BodyFatPercentage":
-            weight = last_known["TrendWeight"]
-            bf = val
-        else:
-            weight = last_known["TrendWeight"]
-            bf = last_known["TrendBodyFatPercentage"]
-
-        lean = weight * (1 - bf)
-        fat = weight * bf
-        future_date = last_known["date"] + pd.Timedelta(days=day)
-        age = calculate_age(dob, future_date)
-        rmr = calculate_rmr(weight, age, sex)
-
-        results[day] = {
+    days = list(forecast_dict)
+    vals = list(forecast_dict.values())
+    val_arr = np.asarray(vals, dtype=np.float64)
+
+    weights = np.full(len(days), float(last_known["TrendWeight"]))
+    bfs = np.full(len(days), float(last_known["TrendBodyFatPercentage"]))
+    if target_metric == "Weight":
+        weights = val_arr
+    elif target_metric == "BodyFatPercentage":
+        bfs = val_arr
+
+    lean = weights * (1 - bfs)
+    fat = weights * bfs
+    future_dates = last_known["date"] + pd.to_timedelta(np.asarray(days), unit="D")
+    ages = calculate_age_array(dob, future_dates)
+    rmr = calculate_rmr_array(weights, ages, sex)
+
+    return {
+        day: {
             target_metric: val,
-            "LeanBodyMass": lean,
-            "FatMass": fat,
-            "RMR": rmr
+            "LeanBodyMass": l,
+            "FatMass": f,
+            "RMR": r
         }
-
-    return results
+        for day, val, l, f, r in zip(days, vals, lean.tolist(), fat.tolist(), rmr.tolist())
+    }
 
 def add_trend_columns(df: pd.DataFrame) -> pd.DataFrame:
     """
@@ -116,18 +117,18 @@ def add_trend_columns(df: pd.DataFrame) -> pd.DataFrame:
     """
     df = df.copy()
 
+    def col(name: str) -> np.ndarray:
+        return df[name].to_numpy(dtype=np.float64)
+
+    # plain ndarray arithmetic: no Series alignment or index checks
     if "TrendTDEE" not in df.columns:
-        df["TrendTDEE"] = (
-            df["TrendBasalCaloriesBurned"] + df["TrendActiveCaloriesBurned"]
-        )
+        df["TrendTDEE"] = col("TrendBasalCaloriesBurned") + col("TrendActiveCaloriesBurned")
 
     if "TrendNetCalories" not in df.columns:
         # positive  => surplus, negative => deficit
-        df["TrendNetCalories"] = df["TrendCaloriesIn"] - df["TrendTDEE"]
+        df["TrendNetCalories"] = col("TrendCaloriesIn") - col("TrendTDEE")
 
     if "TrendLeanBodyMass" not in df.columns:
-        df["TrendLeanBodyMass"] = (
-            df["TrendWeight"] * (1 - df["TrendBodyFatPercentage"])
-        )
+        df["TrendLeanBodyMass"] = col("TrendWeight") * (1 - col("TrendBodyFatPercentage"))
 
-    return df
\ No newline at end of file
+    return df
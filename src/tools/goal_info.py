@@ -10,7 +10,8 @@ GoalWeightKG,GoalDate
 """
 from __future__ import annotations
 import os, csv
-from datetime import datetime
+from datetime import date, datetime
+from functools import lru_cache
 from config.constants import KG_TO_LBS
 
 
@@ -31,17 +32,24 @@ def _prompt_date(prompt: str) -> datetime.date:
             print("Date format must be YYYY-MM-DD.")
 
 
+@lru_cache(maxsize=4)
+def _read_goal(path: str, mtime: float) -> tuple[float, date]:
+    """
+    Parses the stored goal.  *mtime* is part of the cache key only, so an
+    edited file is re-read while repeat calls on an unchanged one are free.
+    """
+    with open(path, newline="") as f:
+        row = next(csv.DictReader(f))
+    return float(row["GoalWeightKG"]), date.fromisoformat(row["GoalDate"])
+
+
 def load_or_prompt_goal(path: str, use_imperial: bool = True) -> dict[str, str | float]:
     """
     Returns {'weight_kg': float, 'date': datetime.date}.  Saves to CSV if absent.
     """
     if os.path.exists(path):
-        with open(path, newline="") as f:
-            row = next(csv.DictReader(f))
-            return {
-                "weight_kg": float(row["GoalWeightKG"]),
-                "date":     datetime.strptime(row["GoalDate"], "%Y-%m-%d").date()
-            }
+        weight_kg, goal_date = _read_goal(path, os.path.getmtime(path))
+        return {"weight_kg": weight_kg, "date": goal_date}
 
     # ------- interactive prompts -------------------------------------------
     unit = "lbs" if use_imperial else "kg"
@@ -1,22 +1,17 @@
 # src/tools/gui_wrappers.py
 from src.visualize.plot_metrics import plot_metrics
-import tempfile
-import os
+import io
 from PIL import Image
 
 def generate_and_load_plots(df, periods, use_imperial=False):
-    with tempfile.TemporaryDirectory() as tmpdir:
-        plot_metrics(df, output_dir=tmpdir, periods=periods, use_imperial_units=use_imperial)
+    # plots are rendered straight into memory; no temp-file round trip
+    plot_dict = {}
 
-        plot_dict = {}
-        for group in ["weight", "calories", "activity"]:
-            images = []
-            group_dir = os.path.join(tmpdir, group)
-            if not os.path.exists(group_dir):
-                continue
-            for file in sorted(os.listdir(group_dir)):
-                if file.endswith(".png"):
-                    path = os.path.join(group_dir, file)
-                    images.append((file, Image.open(path)))
-            plot_dict[group] = images
-        return plot_dict
\ No newline at end of file
+    def collect(group, filename, png):
+        plot_dict.setdefault(group, []).append((filename, Image.open(io.BytesIO(png))))
+
+    plot_metrics(df, periods=periods, use_imperial_units=use_imperial, sink=collect)
+
+    for images in plot_dict.values():
+        images.sort(key=lambda item: item[0])
+    return plot_dict
@@ -1,8 +1,12 @@
-import xml.etree.ElementTree as ET
-from collections import defaultdict
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+import hashlib
 import logging
 import os
+import pickle
 import time
+from src.parse.sharding import iter_records, plan_shards, read_shard
 
 logging.basicConfig(
     level=logging.INFO,
@@ -10,38 +14,117 @@ logging.basicConfig(
     datefmt="%H:%M:%S"
 )
 
-def inspect_export(xml_path: str, output_path: str = "output/record_summary.txt"):
-    if not os.path.exists(xml_path):
-        raise FileNotFoundError(f"File not found: {xml_path}")
+_BATCH_SIZE = 100_000
 
-    start_time = time.time()
-    logging.info(f"Starting to stream-parse: {xml_path}")
 
-    record_counts = defaultdict(int)
-    units_per_type = defaultdict(set)
-    seen_types = set()
+def _type_unit_pairs(source):
+    """Yield (type, unit) for every <Record>, freeing elements as it goes."""
+    for elem in iter_records(source):
+        yield elem.get("type", "UNKNOWN"), elem.get("unit", "None")
 
-    count = 0
-    context = ET.iterparse(xml_path, events=("start", "end"))
-    _, root = next(context)  # get root element
 
-    for event, elem in context:
-        if event == "end" and elem.tag == "Record":
-            r_type = elem.get("type", "UNKNOWN")
-            r_unit = elem.get("unit", "None")
+def _flush(buf: list, record_counts: Counter, units_per_type: dict, total: int, verbose: bool) -> int:
+    """Fold a batch of (type, unit) pairs into the running tallies and clear it."""
+    # distinct pairs in first-seen order, so discovery logs keep stream order
+    for r_type, r_unit in dict.fromkeys(buf):
+        if r_type not in record_counts:
+            if verbose:
+                logging.info(f"Discovered new record type: {r_type} | Unit: {r_unit}")
+            record_counts[r_type] = 0
+        units_per_type.setdefault(r_type, set()).add(r_unit)
+    record_counts.update(r_type for r_type, _ in buf)
 
-            record_counts[r_type] += 1
-            units_per_type[r_type].add(r_unit)
+    new_total = total + len(buf)
+    if verbose and new_total // 1_000_000 > total // 1_000_000:
+        logging.info(f"Parsed {new_total // 1_000_000 * 1_000_000:,} records...")
+    buf.clear()
+    return new_total
 
-            if r_type not in seen_types:
-                logging.info(f"Discovered new record type: {r_type} | Unit: {r_unit}")
-                seen_types.add(r_type)
 
-            count += 1
-            if count % 1_000_000 == 0:
-                logging.info(f"Parsed {count:,} records...")
+def _tally(source, verbose: bool = True):
+    """Count records per type and collect their units from a path or file-like source."""
+    record_counts = Counter()
+    units_per_type = {}
+
+    total = 0
+    buf = []
+    for pair in _type_unit_pairs(source):
+        buf.append(pair)
+        if len(buf) == _BATCH_SIZE:
+            total = _flush(buf, record_counts, units_per_type, total, verbose)
+    if buf:
+        total = _flush(buf, record_counts, units_per_type, total, verbose)
+    return record_counts, units_per_type, total
+
+
+def _merge_tallies(parts: list):
+    """Sum per-shard counts and union their unit sets, keeping first-seen type order."""
+    record_counts = Counter()
+    units_per_type = {}
+    for counts, units, _ in parts:
+        record_counts.update(counts)
+        for r_type, r_units in units.items():
+            units_per_type.setdefault(r_type, set()).update(r_units)
+    return record_counts, units_per_type, sum(total for _, _, total in parts)
+
+
+def _scan(xml_path: str, workers: int):
+    """Tally the export, in parallel shards when it is large and workers > 1."""
+    shards = plan_shards(xml_path, workers)
+
+    if len(shards) > 1:
+        logging.info(f"Scanning in {len(shards)} shards...")
+        with ProcessPoolExecutor(max_workers=len(shards)) as pool:
+            parts = list(pool.map(partial(read_shard, partial(_tally, verbose=False)), shards))
+        record_counts, units_per_type, total = _merge_tallies(parts)
+        for r_type in record_counts:
+            units = ", ".join(sorted(units_per_type[r_type]))
+            logging.info(f"Discovered new record type: {r_type} | Units: {units}")
+    else:
+        record_counts, units_per_type, total = _tally(xml_path)
+    return record_counts, units_per_type, total
+
+
+def _cache_path(xml_path: str, output_path: str) -> str:
+    """Cache file for *xml_path*, keyed on its absolute path, mtime and size."""
+    stat = os.stat(xml_path)
+    key = hashlib.md5(f"{os.path.abspath(xml_path)}:{stat.st_mtime}:{stat.st_size}".encode()).hexdigest()
+    return os.path.join(os.path.dirname(output_path), ".cache", f"{key}.pkl")
+
+
+def _load_cached(cache_path: str):
+    """Cached (counts, units, total), or None when missing or unreadable."""
+    try:
+        with open(cache_path, "rb") as f:
+            record_counts, units_per_type, total = pickle.load(f)
+    except (OSError, pickle.UnpicklingError, EOFError, ValueError):
+        return None
+    return Counter(record_counts), {t: set(u) for t, u in units_per_type.items()}, total
+
+
+def _save_cached(cache_path: str, record_counts: Counter, units_per_type: dict, total: int):
+    """Persist a scan so reruns on the unchanged export skip parsing."""
+    os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+    payload = (dict(record_counts), {t: sorted(u) for t, u in units_per_type.items()}, total)
+    with open(cache_path, "wb", buffering=1 << 20) as f:
+        pickle.dump(payload, f, protocol=5)
+
+
+def inspect_export(xml_path: str, output_path: str = "output/record_summary.txt", workers: int = 1):
+    if not os.path.exists(xml_path):
+        raise FileNotFoundError(f"File not found: {xml_path}")
+
+    start_time = time.time()
+    logging.info(f"Starting to stream-parse: {xml_path}")
 
-            elem.clear()  # free memory
+    cache_path = _cache_path(xml_path, output_path)
+    cached = _load_cached(cache_path)
+    if cached is not None:
+        logging.info(f"Using cached scan: {cache_path}")
+        record_counts, units_per_type, total = cached
+    else:
+        record_counts, units_per_type, total = _scan(xml_path, workers)
+        _save_cached(cache_path, record_counts, units_per_type, total)
 
     os.makedirs(os.path.dirname(output_path), exist_ok=True)
     with open(output_path, "w") as f:
@@ -53,8 +136,8 @@ def inspect_export(xml_path: str, output_path: str = "output/record_summary.txt"
             f.write(f"{r_type}: {count} entries | Units: {units}\n")
 
     elapsed = time.time() - start_time
-    logging.info(f"Finished parsing {count:,} records in {elapsed:.2f} seconds")
+    logging.info(f"Finished parsing {total:,} records in {elapsed:.2f} seconds")
     logging.info(f"Summary saved to: {output_path}")
 
 if __name__ == "__main__":
-    inspect_export("data/export.xml")
\ No newline at end of file
+    inspect_export("data/export.xml", workers=os.cpu_count() or 1)
\ No newline at end of file
@@ -0,0 +1,34 @@
+# src/tools/memo.py
+"""
+Small memoization helpers shared by the forecasting and watchdog caches.
+
+Author: Lincoln Quick
+"""
+
+import hashlib
+
+import pandas as pd
+
+
+def frame_digest(df: pd.DataFrame) -> str:
+    """Content hash of *df* (values and column names, index ignored)."""
+    digest = hashlib.sha256("\x1f".join(map(str, df.columns)).encode())
+    digest.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+class BoundedCache(dict):
+    """
+    Insertion-ordered dict holding at most *maxsize* entries.
+
+    Storing a new key when full evicts the oldest entry (first in, first out).
+    """
+
+    def __init__(self, maxsize: int):
+        super().__init__()
+        self.maxsize = maxsize
+
+    def __setitem__(self, key, value):
+        if key not in self and len(self) >= self.maxsize:
+            del self[next(iter(self))]
+        super().__setitem__(key, value)
@@ -5,11 +5,50 @@ Utility functions for plotting metrics over time for the FitAssist-AI GUI.
 """
 
 import matplotlib.pyplot as plt
+import numpy as np
 import pandas as pd
 
+# Series longer than this are downsampled before plotting
+MAX_PLOT_POINTS = 2000
+LTTB_TARGET_POINTS = 1500
+
+def lttb_indices(x: np.ndarray, y: np.ndarray, n_out: int) -> np.ndarray:
+    """
+    Largest-Triangle-Three-Buckets downsampling.
+
+    Picks *n_out* indices of (x, y) that preserve the visual shape of the
+    line: the first and last points plus, per bucket, the point forming the
+    largest triangle with the previous pick and the next bucket's mean.
+    NaNs in *y* are ignored for selection.
+    """
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    y = np.where(np.isnan(y), np.nanmean(y) if np.isfinite(y).any() else 0.0, y)
+
+    edges = (np.arange(n_out - 1) * ((n - 2) / (n_out - 2))).astype(np.int64) + 1
+    edges[-1] = n - 1
+    picked = np.empty(n_out, dtype=np.int64)
+    picked[0], picked[-1] = 0, n - 1
+    a = 0
+    for i in range(n_out - 2):
+        lo, hi = edges[i], edges[i + 1]
+        nxt_lo, nxt_hi = hi, edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[nxt_lo:nxt_hi].mean()
+        avg_y = y[nxt_lo:nxt_hi].mean()
+        area = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(np.argmax(area))
+        picked[i + 1] = a
+    return picked
+
 def plot_metric_over_time(df: pd.DataFrame, metric: str, time_span: str = "All Time"):
     if "Date" in df.columns:
-        df["Date"] = pd.to_datetime(df["Date"])  # Ensure datetime format
+        # convert once; later GUI redraws on the same frame skip the parse
+        if not pd.api.types.is_datetime64_any_dtype(df["Date"]):
+            df["Date"] = pd.to_datetime(df["Date"], format="ISO8601", cache=True)
         df = df.set_index("Date")
 
     if not isinstance(df.index, pd.DatetimeIndex):
@@ -17,14 +56,19 @@ def plot_metric_over_time(df: pd.DataFrame, metric: str, time_span: str = "All T
 
     series = df[metric].dropna()
 
-    # Resample for aggregation
+    # Resample for aggregation ("All Time" plots the daily series as is)
     if time_span == "Yearly":
-        series = series.resample("Y").mean()
+        series = series.resample("YE").mean()
     elif time_span == "Monthly":
-        series = series.resample("M").mean()
+        series = series.resample("ME").mean()
     elif time_span == "Weekly":
         series = series.resample("W-MON").mean()
 
+    # Long histories are thinned to their visually significant points
+    if len(series) > MAX_PLOT_POINTS:
+        x = series.index.to_numpy().astype("datetime64[ns]").astype(np.int64)
+        series = series.iloc[lttb_indices(x, series.to_numpy(), LTTB_TARGET_POINTS)]
+
     fig, ax = plt.subplots(figsize=(10, 4))
     ax.plot(series.index, series.values, marker='o', linestyle='-')
     ax.set_title(f"{metric} Over Time ({time_span})")
@@ -1,40 +1,53 @@
-import xml.etree.ElementTree as ET
-from datetime import datetime
+import mmap
 import os
 
+_FLUSH_BYTES = 4 << 20
+
+def _record_tags(data, needle: bytes):
+    """Yield each <Record> start tag containing needle, as a self-closed tag."""
+    pos = data.find(needle)
+    while pos != -1:
+        tag_start = data.rfind(b"<", 0, pos)
+        tag_end = data.find(b">", pos)
+        # the same attribute also appears on Workout/Correlation elements
+        if data[tag_start:tag_start + 8] in (b"<Record ", b"<Record\n", b"<Record\t"):
+            tag = data[tag_start:tag_end + 1]
+            yield tag if tag.endswith(b"/>") else tag[:-1] + b"/>"
+        pos = data.find(needle, tag_end)
+
+
 def trim_apple_health_export(input_path: str, output_path: str, year: int, month: int):
     if not os.path.exists(input_path):
         raise FileNotFoundError(f"Input file not found: {input_path}")
 
     print(f"Trimming Apple Health export for {year}-{month:02d}...")
 
-    new_root = ET.Element("HealthData")
-    context = ET.iterparse(input_path, events=("start", "end"))
-    context = iter(context)
-    _, root = next(context)
+    # startDate is "YYYY-MM-DD ...", so the month is a plain byte prefix;
+    # a C-level find over the mapped file locates each candidate and the
+    # matching Record tags are copied out verbatim, without an XML parser
+    needle = f' startDate="{year:04d}-{month:02d}-'.encode()
 
     count = 0
-    for event, elem in context:
-        if event == "end" and elem.tag == "Record":
-            start_date = elem.get("startDate")
-            if start_date:
-                try:
-                    record_date = datetime.strptime(start_date[:10], "%Y-%m-%d")
-                    if record_date.year == year and record_date.month == month:
-                        # Copy attributes manually
-                        new_elem = ET.Element("Record", attrib=elem.attrib.copy())
-                        new_root.append(new_elem)
-                        count += 1
-                except Exception:
-                    pass
-            elem.clear()
+    # matching records are streamed straight to disk; writes are batched
+    # through a buffer flushed every _FLUSH_BYTES
+    buf = bytearray(b"<?xml version='1.0' encoding='utf-8'?>\n<HealthData>\n")
+    with open(input_path, "rb") as src, open(output_path, "wb") as out:
+        with mmap.mmap(src.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            for tag in _record_tags(data, needle):
+                # the source bytes are already well-formed, escaped XML; only
+                # the start tag is kept, so child elements are dropped as before
+                buf += b"  "
+                buf += tag
+                buf += b"\n"
+                count += 1
+                if len(buf) >= _FLUSH_BYTES:
+                    out.write(buf)
+                    buf.clear()
+        buf += b"</HealthData>\n"
+        out.write(buf)
 
     print(f"Copied {count} records to trimmed file.")
 
-    tree = ET.ElementTree(new_root)
-    ET.indent(tree, space="  ", level=0)
-    tree.write(output_path, encoding="utf-8", xml_declaration=True)
-
 # Example usage
 if __name__ == "__main__":
     trim_apple_health_export(
@@ -42,4 +55,4 @@ if __name__ == "__main__":
         output_path="data/export_april_2025.xml",
         year=2025,
         month=4
-    )
\ No newline at end of file
+    )
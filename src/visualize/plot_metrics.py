@@ -15,11 +15,17 @@ fill in gaps caused by missing raw data.
 Author: Lincoln Quick
 """
 
+import io
 import os
 import logging
-import matplotlib.pyplot as plt
+from concurrent.futures import ProcessPoolExecutor
+from typing import Callable, Optional
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_agg import FigureCanvasAgg
+import numpy as np
 import pandas as pd
 from config.constants import KG_TO_LBS
+from src.tools.plot_utils import lttb_indices, MAX_PLOT_POINTS, LTTB_TARGET_POINTS
 
 logger = logging.getLogger(__name__)
 
@@ -44,12 +50,21 @@ TREND_MAPPING = {
     'ActiveCaloriesBurned': 'TrendActiveCaloriesBurned',
 }
 
+# Below this many plots the process-pool start-up costs more than it saves
+_MIN_PARALLEL_PLOTS = 24
+
+# Groups drawn with bars or stacked areas; thinning those would leave gaps
+# that are not in the data, so they are always drawn in full
+_UNTHINNED_GROUPS = {"activity", "calories"}
+
 
 def plot_metrics(
         df: pd.DataFrame,
         output_dir: str = "output/plots",
         periods: list[str] = ["full", "year", "month"],
-        use_imperial_units: bool = False):
+        use_imperial_units: bool = False,
+        workers: int = 1,
+        sink: Optional[Callable[[str, str, bytes], None]] = None):
     """
     Generate and save time series plots for grouped health metrics.
 
@@ -58,10 +73,17 @@ def plot_metrics(
         output_dir (str): Root output folder to save plots.
         periods (list[str]): Which time periods to generate plots for ('full', 'year', 'month').
         use_imperial_units (bool): Whether to display weight in pounds.
+        workers (int): Number of processes to render plots with.
+        sink (callable, optional): If given, called as sink(group_name, filename, png_bytes)
+            for every plot instead of writing PNG files under output_dir. Plots
+            are then rendered in-process.
     """
-    os.makedirs(output_dir, exist_ok=True)
-    df = df.copy()
-    df["date"] = pd.to_datetime(df["date"])
+    if sink is None:
+        os.makedirs(output_dir, exist_ok=True)
+    # the caller's frame is never modified or copied: dates are converted
+    # into a new frame only when needed, and mass units are scaled per plot
+    if not pd.api.types.is_datetime64_any_dtype(df["date"]):
+        df = df.assign(date=pd.to_datetime(df["date"], cache=True))
 
     # Log missing values for diagnostics
     for trend_metric in ["TrendWeight", "TrendBodyFatPercentage", "TrendLeanBodyMass"]:
@@ -69,13 +91,24 @@ def plot_metrics(
             missing_dates = df[df[trend_metric].isna()]["date"].tolist()
             logger.debug(f"{trend_metric} has missing values on: {missing_dates}")
 
-    # Convert mass units if needed
-    if use_imperial_units:
-        if "TrendWeight" in df.columns:
-            df["TrendWeight"] *= KG_TO_LBS
-        if "TrendLeanBodyMass" in df.columns:
-            df["TrendLeanBodyMass"] *= KG_TO_LBS
-
+    # Split into year/month sub-frames once (datetime64 truncation instead of
+    # .dt accessors) and reuse them for every metric group; group order only
+    # decides render order, so the key sort is skipped
+    dates = df["date"].to_numpy()
+    year_frames = []
+    if "year" in periods:
+        year_frames = [
+            (str(key.year), year_df)
+            for key, year_df in df.groupby(dates.astype("datetime64[Y]"), sort=False)
+        ]
+    month_frames = []
+    if "month" in periods:
+        month_frames = [
+            (f"{key.year}-{key.month:02d}", month_df)
+            for key, month_df in df.groupby(dates.astype("datetime64[M]"), sort=False)
+        ]
+
+    tasks = []
     for group_name, metrics in PLOT_GROUPS.items():
         available_metrics = []
         for m in metrics:
@@ -88,60 +121,99 @@ def plot_metrics(
             continue
 
         if "full" in periods:
-            _plot_time_series(df, available_metrics, group_name, output_dir, label="full", use_imperial_units=use_imperial_units)
+            tasks.append((df, available_metrics, group_name, "full"))
+        for label, year_df in year_frames:
+            tasks.append((year_df, available_metrics, group_name, label))
+        for label, month_df in month_frames:
+            tasks.append((month_df, available_metrics, group_name, label))
+
+    if sink is None and workers > 1 and len(tasks) >= _MIN_PARALLEL_PLOTS:
+        # round-robin so every worker gets a mix of long and short frames
+        batches = [tasks[i::workers] for i in range(workers)]
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            list(pool.map(_plot_batch, batches, [output_dir] * workers, [use_imperial_units] * workers))
+    else:
+        _plot_batch(tasks, output_dir, use_imperial_units, sink)
 
-        if "year" in periods:
-            for year, year_df in df.groupby(df["date"].dt.year):
-                _plot_time_series(year_df, available_metrics, group_name, output_dir, label=str(year), use_imperial_units=use_imperial_units)
 
-        if "month" in periods:
-            monthly_groups = df.groupby([df["date"].dt.year, df["date"].dt.month])
-            for (year, month), month_df in monthly_groups:
-                label = f"{year}-{month:02d}"
-                _plot_time_series(month_df, available_metrics, group_name, output_dir, label=label, use_imperial_units=use_imperial_units)
+def _plot_batch(tasks: list[tuple], output_dir: str, use_imperial_units: bool, sink: Optional[Callable] = None):
+    """
+    Render a list of (df, metrics, group_name, label) plots.
 
+    One Agg-backed figure is cleared and redrawn for every plot, instead of a
+    pyplot figure created and torn down per file.
+    """
+    fig = Figure(figsize=(10, 6))
+    FigureCanvasAgg(fig)
+    for plot_df, metrics, group_name, label in tasks:
+        _plot_time_series(fig, plot_df, metrics, group_name, output_dir, label=label, use_imperial_units=use_imperial_units, sink=sink)
+
+
+def _legend(ax1, ax2, ax2_ylabel: str):
+    """Label the optional twin axis and draw one legend covering both axes."""
+    if ax2 is None:
+        ax1.legend(loc="upper left")
+        return
+    ax2.set_ylabel(ax2_ylabel)
+    lines, labels = ax1.get_legend_handles_labels()
+    lines2, labels2 = ax2.get_legend_handles_labels()
+    ax1.legend(lines + lines2, labels + labels2, loc="upper left")
 
-def _plot_time_series(df: pd.DataFrame, metrics: list[str], group_name: str, output_dir: str, label: str, use_imperial_units: bool = False):
+
+def _plot_time_series(fig: Figure, df: pd.DataFrame, metrics: list[str], group_name: str, output_dir: str, label: str, use_imperial_units: bool = False, sink: Optional[Callable] = None):
     """
     Internal helper to plot and save a single time series graph.
 
     Args:
+        fig (Figure): Reusable figure; cleared before drawing.
         df (pd.DataFrame): Data subset to plot.
         metrics (list[str]): Column names to include.
         group_name (str): Name of the plot group (used in filename).
         output_dir (str): Output folder path.
         label (str): Time period label (e.g., "full", "2025", "2025-04").
         use_imperial_units (bool): Whether to show weight in pounds.
+        sink (callable, optional): Receives (group_name, filename, png_bytes) instead of a file write.
     """
     if df.empty:
         logger.warning(f"Skipping empty data for {group_name} - {label}")
         return
 
-    plt.figure(figsize=(10, 6))
+    # Long ranges (multi-year "full" plots) of line-only groups are thinned
+    # with LTTB so rendering cost stays bounded; every drawn series keeps the
+    # points chosen for its own curve
+    if len(df) > MAX_PLOT_POINTS and group_name not in _UNTHINNED_GROUPS:
+        x = df["date"].to_numpy().astype("datetime64[ns]").astype(np.int64)
+        picks = [
+            lttb_indices(x, df[col].to_numpy(dtype=np.float64), LTTB_TARGET_POINTS)
+            for col in metrics if col in df.columns
+        ]
+        if picks:
+            df = df.iloc[np.unique(np.concatenate(picks))]
+
+    fig.clear()
 
     if group_name == "weight":
-        ax1 = plt.gca()
-        ax2 = ax1.twinx()
+        # the right-hand body-fat axis is only laid out when this slice has data for it
+        has_bf = "TrendBodyFatPercentage" in metrics and df["TrendBodyFatPercentage"].notna().any()
+        ax1 = fig.gca()
+        ax2 = ax1.twinx() if has_bf else None
+        mass_scale = KG_TO_LBS if use_imperial_units else 1.0
 
         for col in metrics:
             if col == "TrendWeight":
                 label_text = "Weight (lb)" if use_imperial_units else "Weight (kg)"
-                ax1.plot(df["date"], df[col], label=label_text, color="tab:blue", linewidth=2)
+                ax1.plot(df["date"], df[col].to_numpy() * mass_scale, label=label_text, color="tab:blue", linewidth=2)
             elif col == "TrendLeanBodyMass":
                 label_text = "Lean Body Mass (lb)" if use_imperial_units else "Lean Body Mass (kg)"
-                ax1.plot(df["date"], df[col], label=label_text, color="tab:green", linewidth=2)
-            elif col == "TrendBodyFatPercentage":
+                ax1.plot(df["date"], df[col].to_numpy() * mass_scale, label=label_text, color="tab:green", linewidth=2)
+            elif col == "TrendBodyFatPercentage" and has_bf:
                 ax2.plot(df["date"], df[col] * 100, label="Body Fat (%)", color="tab:red", linewidth=2, linestyle="--")
 
         ax1.set_ylabel("Mass (lb)" if use_imperial_units else "Mass (kg)")
-        ax2.set_ylabel("Body Fat (%)")
-
-        lines, labels = ax1.get_legend_handles_labels()
-        lines2, labels2 = ax2.get_legend_handles_labels()
-        ax1.legend(lines + lines2, labels + labels2, loc="upper left")
+        _legend(ax1, ax2, "Body Fat (%)")
 
     elif group_name == "calories":
-        ax = plt.gca()
+        ax = fig.gca()
         if "RMR" in metrics and "PA" in metrics:
             ax.stackplot(df["date"],
                          df["RMR"],
@@ -157,37 +229,43 @@ def _plot_time_series(df: pd.DataFrame, metrics: list[str], group_name: str, out
         ax.legend()
 
     elif group_name == "activity":
-        ax1 = plt.gca()
-        ax2 = ax1.twinx()
+        has_distance = "DistanceWalkingRunning" in df and df["DistanceWalkingRunning"].notna().any()
+        ax1 = fig.gca()
+        ax2 = ax1.twinx() if has_distance else None
 
         if "StepCount" in df:
             ax1.bar(df["date"], df["StepCount"], width=0.8, label="Steps", alpha=0.4, color="tab:blue")
-        if "DistanceWalkingRunning" in df:
+        if has_distance:
             ax2.plot(df["date"], df["DistanceWalkingRunning"], label="Distance (km)", color="tab:green", linewidth=2)
 
         ax1.set_ylabel("Step Count")
-        ax2.set_ylabel("Distance (km)")
-
-        lines, labels = ax1.get_legend_handles_labels()
-        lines2, labels2 = ax2.get_legend_handles_labels()
-        ax1.legend(lines + lines2, labels + labels2, loc="upper left")
+        _legend(ax1, ax2, "Distance (km)")
 
     else:
+        ax = fig.gca()
         for col in metrics:
             if col in df.columns:
-                plt.plot(df["date"], df[col], label=col, linewidth=2)
-        plt.ylabel("Value")
+                ax.plot(df["date"], df[col], label=col, linewidth=2)
+        ax.set_ylabel("Value")
 
-    plt.title(f"{group_name.title()} Metrics - {label}")
-    plt.xlabel("Date")
-    plt.grid(True)
-    plt.tight_layout()
+    # like pyplot, these apply to the current (last created) axes
+    ax = fig.gca()
+    ax.set_title(f"{group_name.title()} Metrics - {label}")
+    ax.set_xlabel("Date")
+    ax.grid(True)
+    fig.tight_layout()
+
+    filename = f"{group_name}_{label}.png"
+    if sink is not None:
+        buf = io.BytesIO()
+        fig.savefig(buf, format="png")
+        sink(group_name, filename, buf.getvalue())
+        logger.debug(f"Rendered plot: {filename}")
+        return
 
     group_dir = os.path.join(output_dir, group_name)
     os.makedirs(group_dir, exist_ok=True)
-    filename = f"{group_name}_{label}.png"
     filepath = os.path.join(group_dir, filename)
-    plt.savefig(filepath)
-    plt.close()
+    fig.savefig(filepath)
 
     logger.debug(f"Saved plot: {filepath}")
\ No newline at end of file
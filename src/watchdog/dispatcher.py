@@ -4,7 +4,7 @@ watchdog.dispatcher
 Central runner that
 
 1. builds the weekly feature window (re-uses feature_builder),
-2. executes every rule in rules.ALL_RULES,
+2. executes every rule in rules.ALL_RULES (via rules.run_rules),
 3. returns a list of triggered alerts in (code, message) tuples.
 """
 
@@ -13,13 +13,16 @@ from typing import List, Tuple
 import pandas as pd
 
 from .feature_builder import build_watchdog_features
-from .rules import ALL_RULES
+from .rules import latest_context, run_rules
 
 
-def run_watchdog(df_daily: pd.DataFrame, dob, sex, goal_info: dict | None = None ) -> List[Tuple[str, str]]:
+def run_watchdog(df_daily: pd.DataFrame, dob, sex, goal_info: dict | None = None, now: pd.Timestamp | None = None) -> List[Tuple[str, str]]:
     """
     Evaluate the FOL rule set on the most-recent 12 weeks.
 
+    *now* is the reference time every rule shares (default: today,
+    normalized); pass a fixed value for reproducible results.
+
     Returns
     -------
     list[tuple]   e.g.  [("UnsafeIntake", "..."), ("LowRMR", "...")]
@@ -29,19 +32,9 @@ def run_watchdog(df_daily: pd.DataFrame, dob, sex, goal_info: dict | None = None
     if weekly.empty:
         return [("NoData", "No weekly data available for watchdog checks")]
 
-    latest = weekly.iloc[-1]
-
-    alerts = []
+    latest = latest_context(weekly)
     ctx = dict(goal_info=goal_info, df_daily=df_daily, dob=dob, sex=sex)
 
-    for rule_fn in ALL_RULES:
-        try:
-            out = rule_fn(latest, weekly, **ctx)   # full signature
-        except TypeError:
-            # Rule doesn't declare those keywords – fall back to bare call
-            out = rule_fn(latest, weekly)
-
-        if out is not None:
-            alerts.append(out)
-
-    return alerts
\ No newline at end of file
+    if now is None:
+        now = pd.Timestamp.now().normalize()
+    return run_rules(latest, weekly, now=now, **ctx)
\ No newline at end of file
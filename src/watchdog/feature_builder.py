@@ -12,7 +12,7 @@ import pandas as pd
 import numpy  as np
 
 from datetime       import datetime
-from src.tools.energy      import calculate_age, calculate_rmr
+from src.tools.energy      import calculate_age_array, calculate_rmr_array
 from config.constants      import (
     SAFE_MIN_CALORIES,
     RMR_FLOOR,
@@ -20,24 +20,21 @@ from config.constants      import (
     GAP_THRESH,
 )
 
-# helper: make sure TrendNetCalories exists so we can aggregate it
-def _ensure_trend_net(df: pd.DataFrame) -> pd.DataFrame:
-    df = df.copy()
-    if "TrendNetCalories" not in df.columns:
-        if "TrendTDEE" in df.columns:
-            df["TrendNetCalories"] = df["TrendCaloriesIn"] - df["TrendTDEE"]
-        elif (
-            "TrendBasalCaloriesBurned" in df.columns
-            and "TrendActiveCaloriesBurned" in df.columns
-        ):
-            df["TrendNetCalories"] = (
-                df["TrendCaloriesIn"]
-                - df["TrendBasalCaloriesBurned"]
-                - df["TrendActiveCaloriesBurned"]
-            )
-        else:
-            df["TrendNetCalories"] = 0.0       
-    return df
+# source columns the weekly aggregation reads
+_FEATURE_COLUMNS = [
+    "date",
+    "TrendWeight",
+    "TrendCaloriesIn",
+    "TrendActiveCaloriesBurned",
+]
+
+
+def sort_by_date(df: pd.DataFrame) -> pd.DataFrame:
+    """Return *df* in date order, passing an already-sorted frame through."""
+    # load_cleaned_metrics sorts once at ingest, so this is usually an O(n) check
+    if df["date"].is_monotonic_increasing:
+        return df
+    return df.sort_values("date")
 
 
 # ----------------------------------------------------------------
@@ -53,31 +50,37 @@ def build_watchdog_features(df: pd.DataFrame, dob, sex) -> pd.DataFrame:
         rmr           – mean RMR for the week
         adaptation    – relative ΔRMR vs. peak (0-1)
     """
-    df = df.copy()
+    # work on the few columns used below instead of a copy of the whole frame
+    has_net = "TrendNetCalories" in df.columns
+    extra = ["TrendNetCalories"] if has_net else ["TrendBasalCaloriesBurned"]
+    df = df[_FEATURE_COLUMNS + extra].copy()
     df["date"] = pd.to_datetime(df["date"])
+    # date order lets groupby(sort=False) emit weeks chronologically
+    df = sort_by_date(df)
 
     # --------- guarantee net-calories field ----------
-    if "TrendNetCalories" not in df.columns:
+    if not has_net:
         df["TrendNetCalories"] = (
-            df["TrendCaloriesIn"]
-            - df["TrendBasalCaloriesBurned"]
-            - df["TrendActiveCaloriesBurned"]
+            df["TrendCaloriesIn"].to_numpy()
+            - df["TrendBasalCaloriesBurned"].to_numpy()
+            - df["TrendActiveCaloriesBurned"].to_numpy()
         )
 
-    # ISO week tag
-    df["iso_year"] = df["date"].dt.isocalendar().year
-    df["iso_week"] = df["date"].dt.isocalendar().week
+    # ISO week tag, packed into one integer key (year * 64 + week) so the
+    # groupby hashes a single column instead of building a MultiIndex
+    iso = df["date"].dt.isocalendar()
+    df["week_id"] = iso["year"] * 64 + iso["week"]
 
     # ---------- RMR & adaptation ---------------------
-    df["Age"] = df["date"].apply(lambda d: calculate_age(dob, d))
-    df["RMR"] = df.apply(lambda r: calculate_rmr(r["TrendWeight"], r["Age"], sex), axis=1)
+    # ages stay a local array; only RMR is aggregated
+    ages = calculate_age_array(dob, df["date"].to_numpy())
+    df["RMR"] = calculate_rmr_array(df["TrendWeight"].to_numpy(), ages, sex)
 
     peak_rmr = df["RMR"].max()
-    df["adapt"] = 1.0 - (df["RMR"] / peak_rmr)
 
     # ---------- weekly aggregation -------------------
     w = (
-        df.groupby(["iso_year", "iso_week"], as_index=False)
+        df.groupby("week_id", as_index=False, sort=False)
         .agg(
             week_end_date=("date", "max"),
             mean_cal_in=("TrendCaloriesIn", "mean"),
@@ -85,20 +88,15 @@ def build_watchdog_features(df: pd.DataFrame, dob, sex) -> pd.DataFrame:
             mean_pa=("TrendActiveCaloriesBurned", "mean"),
             start_wt=("TrendWeight", "first"),
             end_wt=("TrendWeight", "last"),
-            mean_rmr=("RMR", "mean"),
-            mean_adapt=("adapt", "mean"),
+            rmr=("RMR", "mean"),
         )
-        .sort_values("week_end_date")
     )
 
-    w["wt_change"] = w["end_wt"] - w["start_wt"]
-
-    # Rename to the names expected by rules.py
-    w = w.rename(
-        columns={
-            "mean_rmr": "rmr",
-            "mean_adapt": "adaptation",
-        }
-    )
+    # rmr is aggregated straight into the name rules.py expects; the mean of
+    # 1 - RMR/peak over a week is 1 - mean(RMR)/peak, so adaptation is
+    # derived from the weekly means rather than a daily column
+    w["adaptation"] = 1.0 - w["rmr"].to_numpy() / peak_rmr
+    w["wt_change"] = w["end_wt"].to_numpy() - w["start_wt"].to_numpy()
 
-    return w.tail(12)   # only 12 most-recent weeks
\ No newline at end of file
+    # only 12 most-recent weeks; short histories are returned as-is
+    return w if len(w) <= 12 else w.iloc[-12:]
\ No newline at end of file
@@ -10,10 +10,18 @@ from __future__ import annotations
 from datetime import datetime
 from typing import Dict, Any, Tuple, Optional
 
+import numpy as np
 import pandas as pd
 
-from src.predict.forecast_metric import forecast_metric
-from src.tools.energy import calculate_age
+from src.tools.memo import BoundedCache, frame_digest
+
+# Results keyed by frame content and goal arguments; the dispatcher re-runs
+# the goal rule on every evaluation even when nothing has changed.
+_GOAL_CACHE_SIZE = 32
+_GOAL_CACHE: Dict[tuple, tuple] = BoundedCache(_GOAL_CACHE_SIZE)
+
+# Spacing (days) of the coarse forecast grid used to bracket the goal crossing
+_GRID_STEP = 7
 
 
 def assess_goal_feasibility(
@@ -34,41 +42,75 @@ def assess_goal_feasibility(
         "last_pred": float              # final weight at horizon if never reached
     }
     """
-    # --------------- run weight forecast -----------------
-    days_to_forecast = list(range(1, horizon_days + 1))
-    forecast, *_ = forecast_metric(
-        df=df,
-        target_metric="Weight",
-        forecast_days=days_to_forecast,
-        dob=dob,
-        sex=sex,
-    )
+    key = (frame_digest(df), pd.Timestamp(dob), sex, goal_weight_kg, goal_date, horizon_days)
+    cached = _GOAL_CACHE.get(key)
+    if cached is None:
+        cached = _assess(df, dob, sex, goal_weight_kg, goal_date, horizon_days)
+        _GOAL_CACHE[key] = cached
+
+    feasible, pred_date, delta_days, last_pred = cached
+    return {
+        "feasible": feasible,
+        "pred_date": pred_date,
+        "delta_days": delta_days,    # negative = early
+        "last_pred": last_pred,
+    }
 
+
+def _assess(
+    df: pd.DataFrame,
+    dob: datetime,
+    sex: str,
+    goal_weight_kg: float,
+    goal_date: datetime,
+    horizon_days: int,
+) -> tuple:
+    """Uncached body of assess_goal_feasibility as (feasible, pred_date, delta_days, last_pred)."""
     last_date = df["date"].iloc[-1]
 
     # Direction: decide if user is *losing* or *gaining* toward goal
-    current_wt = df["TrendWeight"].iloc[-1]
+    current_wt = df["TrendWeight"].to_numpy()[-1]
     aiming_down = goal_weight_kg < current_wt
 
-    hit_date: Optional[datetime] = None
-    for d, wt in forecast.items():
-        if (aiming_down and wt <= goal_weight_kg) or (not aiming_down and wt >= goal_weight_kg):
-            hit_date = last_date + pd.Timedelta(days=d)
-            break
+    # --------------- run weight forecast -----------------
+    # a weekly grid (always ending on the horizon) brackets the crossing;
+    # only that week is then forecast daily to pin down the exact day
+    grid = list(range(_GRID_STEP, horizon_days + 1, _GRID_STEP))
+    if not grid or grid[-1] != horizon_days:
+        grid.append(horizon_days)
+    days, wts = _forecast_weights(df, dob, sex, grid)
+    last_pred = wts[-1]
 
-    if hit_date is None:
+    idx = _first_crossing(wts, goal_weight_kg, aiming_down)
+    if idx is None:
         # never crossed
-        return {
-            "feasible": False,
-            "pred_date": None,
-            "delta_days": None,
-            "last_pred": forecast[horizon_days],
-        }
+        return False, None, None, last_pred
+
+    lo = int(days[idx - 1]) if idx > 0 else 0
+    days, wts = _forecast_weights(df, dob, sex, list(range(lo + 1, int(days[idx]) + 1)))
+    hit_date = last_date + pd.Timedelta(days=int(days[_first_crossing(wts, goal_weight_kg, aiming_down)]))
 
     delta = (hit_date - goal_date).days
-    return {
-        "feasible": True,
-        "pred_date": hit_date,
-        "delta_days": delta,    # negative = early
-        "last_pred": forecast[horizon_days],
-    }
\ No newline at end of file
+    return True, hit_date, delta, last_pred
+
+
+def _forecast_weights(df: pd.DataFrame, dob: datetime, sex: str, forecast_days: list) -> tuple:
+    """Weight forecast at *forecast_days* as (days, weights) arrays."""
+    from src.predict.forecast_metric import forecast_metric
+
+    forecast, *_ = forecast_metric(
+        df=df,
+        target_metric="Weight",
+        forecast_days=forecast_days,
+        dob=dob,
+        sex=sex,
+    )
+    days = np.fromiter(forecast.keys(), dtype=np.int64, count=len(forecast))
+    wts = np.fromiter(forecast.values(), dtype=np.float64, count=len(forecast))
+    return days, wts
+
+
+def _first_crossing(wts: np.ndarray, goal_weight_kg: float, aiming_down: bool) -> Optional[int]:
+    """Index of the first forecast at or past the goal, or None."""
+    crossed = wts <= goal_weight_kg if aiming_down else wts >= goal_weight_kg
+    return int(crossed.argmax()) if crossed.any() else None
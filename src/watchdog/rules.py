@@ -5,7 +5,9 @@ Domain-specific first-order-logic “Horn clauses” to enforce
 safety and reasoning constraints *after* statistical predictions.
 
 Each rule is a function that accepts the **latest** weekly record
-plus the *entire* weekly window and returns either:
+(a LatestCtx, read by attribute) plus the *entire* weekly window, and
+optionally the keyword context (now, goal_info, df_daily, dob, sex), and
+returns either:
 
     None                     -  no issue
     (code: str, message: str)
@@ -16,7 +18,7 @@ ALL_RULES at the bottom.
 """
 
 from __future__ import annotations
-from typing import Tuple, Optional
+from typing import NamedTuple, Tuple, Optional
 
 import numpy as np
 import pandas as pd
@@ -24,86 +26,186 @@ import pandas as pd
 from config.constants import SAFE_MIN_CALORIES, SAFE_MAX_WEIGHT_LOSS_RATE, SAFE_MAX_WEIGHT_GAIN_RATE, RMR_FLOOR, ADAPT_THRESH, GAP_THRESH
 
 
+class LatestCtx(NamedTuple):
+    """Fields of the latest weekly record that the rules read."""
+    mean_cal_in: float
+    mean_net_cal: float
+    wt_change: float
+    rmr: float
+    adaptation: float
+    week_end_date: pd.Timestamp
+
+
+def latest_context(weekly: pd.DataFrame) -> LatestCtx:
+    """Snapshot the last weekly row once, so rules use attribute access."""
+    return LatestCtx._make(weekly.iloc[-1][list(LatestCtx._fields)])
+
+
 # Helper 
 def _weekly_rate(kg_change: float) -> float:
     """Convert kg change over one week to absolute rate (kg/week)."""
     return abs(kg_change)
 
+# Alert message templates, formatted once with each rule's args tuple
+MESSAGE_TEMPLATES = {
+    "UnsafeIntake":    "Avg calories (%.0f) below safety floor %s kcal/d",
+    "RapidWeightLoss": "Loss %.2f kg in 7 days – exceeds recommended limit",
+    "RapidWeightGain": "Gain %.2f kg in 7 days – exceeds recommended limit",
+    "LowRMR":          "Estimated RMR %.0f kcal/d below floor (%s) – check data quality / health",
+    "MismatchDeficit": "Sustained caloric deficit but weight ↑ – possible logging error or water retention",
+    "MetabolicAdapt":  "Estimated adaptation %.1f%% – expect plateau; consider diet break / re-feed",
+    "StaleData":       "No new logs for %d days – predictions may be stale",
+    "GoalNotReached":  "Forecast never reaches goal (%.1f kg). Weight at horizon ≈ %.1f kg",
+    "GoalTimingDrift": "Goal hit %d days %s (pred %s)",
+}
+
+
+def format_alert(alert):
+    """Turn a core's (code, args) into the public (code, message) tuple; None passes through."""
+    if alert is None:
+        return None
+    code, args = alert
+    return code, MESSAGE_TEMPLATES[code] % args
+
+
+# Rule predicates: the threshold tests, written so they work on a scalar
+# (the per-rule cores below) and on a column array (run_rules_batch) alike
+def _is_low_intake(cal_in):
+    return cal_in < SAFE_MIN_CALORIES
+
+
+def _is_rapid_loss(wt_change):
+    return wt_change < -SAFE_MAX_WEIGHT_LOSS_RATE
+
+
+def _is_rapid_gain(wt_change):
+    return wt_change > SAFE_MAX_WEIGHT_GAIN_RATE
+
+
+def _is_low_rmr(rmr):
+    return rmr < RMR_FLOOR
+
+
+def _is_deficit_no_loss(net_cal, wt_change):
+    return (net_cal < -500) & (wt_change > 0)
+
+
+def _is_adapted(adaptation):
+    return adaptation > ADAPT_THRESH
+
+
+# Rule cores: plain-scalar checks shared by the rule functions, run_rules and
+# the batch path; each returns (code, args) for MESSAGE_TEMPLATES, or None
+def _min_calorie(cal_in: float):
+    if _is_low_intake(cal_in):
+        return "UnsafeIntake", (cal_in, SAFE_MIN_CALORIES)
+    return None
+
+
+def _rapid_loss(wt_change: float):
+    if _is_rapid_loss(wt_change):
+        return "RapidWeightLoss", (wt_change,)
+    return None
+
+
+def _rapid_gain(wt_change: float):
+    if _is_rapid_gain(wt_change):
+        return "RapidWeightGain", (wt_change,)
+    return None
+
+
+def _rmr_floor(rmr: float):
+    if _is_low_rmr(rmr):
+        return "LowRMR", (rmr, RMR_FLOOR)
+    return None
+
+
+def _deficit_no_loss(net_cal: float, wt_change: float):
+    if _is_deficit_no_loss(net_cal, wt_change):
+        return "MismatchDeficit", ()
+    return None
+
+
+def _plateau_adaptation(adaptation: float):
+    if _is_adapted(adaptation):
+        return "MetabolicAdapt", (adaptation * 100,)
+    return None
+
+
+def _stale_data(week_end_date: pd.Timestamp, now: pd.Timestamp | None = None):
+    if now is None:
+        now = pd.Timestamp.now().normalize()
+    gap = (now - week_end_date).days
+    if gap > GAP_THRESH:
+        return "StaleData", (gap,)
+    return None
+
+
+# Fields of the latest weekly record each per-week core reads, in argument
+# order; the rule functions and run_rules_batch both look them up here
+_CORE_FIELDS = {
+    _min_calorie:         ("mean_cal_in",),
+    _rapid_loss:          ("wt_change",),
+    _rapid_gain:          ("wt_change",),
+    _rmr_floor:           ("rmr",),
+    _deficit_no_loss:     ("mean_net_cal", "wt_change"),
+    _plateau_adaptation:  ("adaptation",),
+}
+
+
+def _check(core, latest: LatestCtx):
+    """Run *core* on its fields of *latest* and format the result."""
+    return format_alert(core(*(getattr(latest, f) for f in _CORE_FIELDS[core])))
+
+
 # Safety rules 
-def min_calorie_rule(latest: pd.Series, *_):
+def min_calorie_rule(latest: LatestCtx, _weekly=None, **_):
     """Calories < SAFE_MIN_CALORIES → unsafe."""
-    if latest["mean_cal_in"] < SAFE_MIN_CALORIES:
-        return ("UnsafeIntake",
-                f"Avg calories ({latest['mean_cal_in']:.0f}) "
-                f"below safety floor {SAFE_MIN_CALORIES} kcal/d")
-    return None
+    return _check(_min_calorie, latest)
 
 
-def rapid_loss_rule(latest: pd.Series, *_):
+def rapid_loss_rule(latest: LatestCtx, _weekly=None, **_):
     """Weekly weight change < -SAFE_MAX_WEIGHT_LOSS_RATE → flag."""
-    if latest["wt_change"] < -SAFE_MAX_WEIGHT_LOSS_RATE:
-        return ("RapidWeightLoss",
-                f"Loss {latest['wt_change']:.2f} kg in 7 days – "
-                "exceeds recommended limit")
-    return None
+    return _check(_rapid_loss, latest)
 
 
-def rapid_gain_rule(latest: pd.Series, *_):
+def rapid_gain_rule(latest: LatestCtx, _weekly=None, **_):
     """Weekly weight gain > SAFE_MAX_WEIGHT_GAIN_RATE → flag."""
-    if latest["wt_change"] > SAFE_MAX_WEIGHT_GAIN_RATE:
-        return ("RapidWeightGain",
-                f"Gain {latest['wt_change']:.2f} kg in 7 days – "
-                "exceeds recommended limit")
-    return None
+    return _check(_rapid_gain, latest)
 
 
-def rmr_floor_rule(latest: pd.Series, *_):
+def rmr_floor_rule(latest: LatestCtx, _weekly=None, **_):
     """RMR slipping under physiological floor."""
-    if latest["rmr"] < RMR_FLOOR:
-        return ("LowRMR",
-                f"Estimated RMR {latest['rmr']:.0f} kcal/d below "
-                f"floor ({RMR_FLOOR}) – check data quality / health")
-    return None
+    return _check(_rmr_floor, latest)
 
 
 
 # Reasoning / consistency rules 
-def deficit_no_loss_rule(latest: pd.Series, _weekly: pd.DataFrame):
+def deficit_no_loss_rule(latest: LatestCtx, _weekly=None, **_):
     """
     Large caloric deficit but weight not dropping → mismatch / logging issue.
     """
-    if latest["mean_net_cal"] < -500 and latest["wt_change"] > 0:
-        return ("MismatchDeficit",
-                "Sustained caloric deficit but weight ↑ – possible "
-                "logging error or water retention")
-    return None
+    return _check(_deficit_no_loss, latest)
 
 
-def plateau_adaptation_rule(latest: pd.Series, _weekly: pd.DataFrame):
+def plateau_adaptation_rule(latest: LatestCtx, _weekly=None, **_):
     """Adaptation exceeds threshold – weight loss expected to slow."""
-    if latest["adaptation"] > ADAPT_THRESH:
-        return ("MetabolicAdapt",
-                f"Estimated adaptation {latest['adaptation']*100:.1f}% "
-                "– expect plateau; consider diet break / re-feed")
-    return None
+    return _check(_plateau_adaptation, latest)
 
 
-def stale_data_rule(_latest: pd.Series, weekly: pd.DataFrame):
-    """No readings for > GAP_THRESH days – cannot trust model."""
-    gap = (pd.Timestamp.now().normalize() - weekly["week_end_date"].iloc[-1]).days
-    if gap > GAP_THRESH:
-        return ("StaleData",
-                f"No new logs for {gap} days – predictions may be stale")
-    return None
+def stale_data_rule(_latest: LatestCtx, weekly: pd.DataFrame, *, now: pd.Timestamp | None = None, **_):
+    """No readings for > GAP_THRESH days – cannot trust model.  *now* defaults to today."""
+    return format_alert(_stale_data(weekly["week_end_date"].iloc[-1], now))
 
 def goal_feasible_rule(
-        latest: pd.Series, 
+        latest: LatestCtx, 
         weekly: pd.DataFrame, 
         *,
         goal_info: dict | None = None,
         df_daily: pd.DataFrame | None = None, 
         dob = None, 
-        sex: str = 'male'
+        sex: str = 'male',
+        **_
         ):
     """
     Side-data rule: check if forecast reaches goal_weight by goal_date.
@@ -123,14 +225,10 @@ def goal_feasible_rule(
     )
 
     if not res["feasible"]:
-        return ("GoalNotReached",
-                f"Forecast never reaches goal ({goal_info['weight_kg']:.1f} kg). "
-                f"Weight at horizon ≈ {res['last_pred']:.1f} kg")
+        return format_alert(("GoalNotReached", (goal_info["weight_kg"], res["last_pred"])))
     if abs(res["delta_days"]) > 14:  # >2 weeks early/late
         when = "late" if res["delta_days"] > 0 else "early"
-        return ("GoalTimingDrift",
-                f"Goal hit {abs(res['delta_days'])} days {when} "
-                f"(pred {res['pred_date'].date()})")
+        return format_alert(("GoalTimingDrift", (abs(res["delta_days"]), when, res["pred_date"].date())))
     return None
 
 
@@ -144,4 +242,75 @@ ALL_RULES = [
     plateau_adaptation_rule,
     stale_data_rule,
     goal_feasible_rule
-]
\ No newline at end of file
+]
+
+
+def _call_rule(rule_fn, latest, weekly, ctx: dict):
+    try:
+        return rule_fn(latest, weekly, **ctx)   # full signature
+    except TypeError:
+        # Rule doesn't declare those keywords – fall back to bare call
+        return rule_fn(latest, weekly)
+
+
+def run_rules(latest: LatestCtx, weekly: pd.DataFrame, *, now: pd.Timestamp | None = None, **ctx) -> list:
+    """
+    Evaluate ALL_RULES on the latest week and return the triggered alerts.
+
+    Every rule gets *latest* (see latest_context), the weekly window and the
+    keyword context, *now* included; the built-in rules ignore keywords they
+    do not use.  *now* (default: today, normalized) is the reference time
+    for staleness.
+    """
+    ctx["now"] = now
+    results = (_call_rule(rule_fn, latest, weekly, ctx) for rule_fn in ALL_RULES)
+    return [out for out in results if out is not None]
+
+# Per-week rules for batch evaluation, one entry per flag column:
+# alert code -> (predicate, core); the columns both read are _CORE_FIELDS[core].
+# StaleData and the goal rule only make sense for the latest week.
+_BATCH_RULES = {
+    "UnsafeIntake":    (_is_low_intake, _min_calorie),
+    "RapidWeightLoss": (_is_rapid_loss, _rapid_loss),
+    "RapidWeightGain": (_is_rapid_gain, _rapid_gain),
+    "LowRMR":          (_is_low_rmr, _rmr_floor),
+    "MismatchDeficit": (_is_deficit_no_loss, _deficit_no_loss),
+    "MetabolicAdapt":  (_is_adapted, _plateau_adaptation),
+}
+
+
+def run_rules_batch(weekly: pd.DataFrame) -> pd.DataFrame:
+    """
+    Evaluate the per-week rules over the whole weekly window at once.
+
+    Returns a boolean DataFrame aligned with *weekly*, one column per alert
+    code in _BATCH_RULES, True where that week triggers the rule.
+    """
+    columns = {}
+    arrays = {}
+    for code, (predicate, core) in _BATCH_RULES.items():
+        fields = _CORE_FIELDS[core]
+        for field in fields:
+            if field not in arrays:
+                arrays[field] = weekly[field].to_numpy(dtype=np.float64)
+        columns[code] = predicate(*(arrays[field] for field in fields))
+    return pd.DataFrame(columns, index=weekly.index)
+
+
+def batch_alert_messages(weekly: pd.DataFrame, flags: pd.DataFrame) -> list:
+    """
+    Format the alerts flagged by run_rules_batch.
+
+    Returns [(week_end_date, code, message), ...] in week order; messages are
+    only built for the cells that are True.
+    """
+    hits = flags.to_numpy()
+    rows, cols = np.nonzero(hits)
+    codes = flags.columns
+    alerts = []
+    for row, col in zip(rows.tolist(), cols.tolist()):
+        _, core = _BATCH_RULES[codes[col]]
+        week = weekly.iloc[row]
+        _, message = format_alert(core(*(week[f] for f in _CORE_FIELDS[core])))
+        alerts.append((week["week_end_date"], codes[col], message))
+    return alerts
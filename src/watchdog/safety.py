@@ -1,18 +1,37 @@
 # ── src/watchdog/safety.py ───────────────────────────────────────
-from typing import List, Tuple, Dict
+from typing import List, Tuple, Dict, Optional
+import numpy as np
 import pandas as pd
 from datetime import datetime
 from config.constants import (
     SAFE_MIN_CALORIES, SAFE_MAX_WEIGHT_LOSS_RATE,
     SAFE_MAX_WEIGHT_GAIN_RATE, RMR_FLOOR
 )
+from src.watchdog.feature_builder import sort_by_date
+
+# Alert slots in safety_checks: intake, loss/gain, RMR, goal
+_N_RULES = 4
+
+# Fewer readings than this in the 30-day window use the two-point slope
+_MIN_FIT_POINTS = 5
 
 # Helper ------------------------------------------------------------------
-def _weekly_weight_change(df: pd.DataFrame) -> float:
-    last7 = df.sort_values("date").tail(7)
+def _weekly_weight_change(last7: np.ndarray) -> float:
     if len(last7) < 2:
         return 0.0
-    return last7["TrendWeight"].iloc[-1] - last7["TrendWeight"].iloc[0]
+    return last7[-1] - last7[0]
+
+def _daily_trend(dates: np.ndarray, weights: np.ndarray) -> float:
+    """
+    Least-squares slope (kg/day) of weight against elapsed days.  Windows
+    with fewer than _MIN_FIT_POINTS readings fall back to the two-point
+    change over 30 days.
+    """
+    ok = np.isfinite(weights)
+    if ok.sum() < _MIN_FIT_POINTS:
+        return (weights[-1] - weights[0]) / 30.0
+    days = (dates[ok] - dates[0]) / np.timedelta64(1, "D")
+    return np.polyfit(days, weights[ok], 1)[0]
 
 # Public API --------------------------------------------------------------
 def safety_checks(
@@ -25,58 +44,64 @@ def safety_checks(
     Run rule-based safety / consistency checks.
     Returns a list of (rule_code, human_message) tuples.
     """
-    alerts: List[Tuple[str, str]] = []
+    # one fixed slot per rule (loss and gain are exclusive and share one),
+    # filled in rule order and compacted on return
+    alerts: List[Optional[Tuple[str, str]]] = [None] * _N_RULES
+
+    # every rule reads the same positional tails of these arrays
+    df = sort_by_date(df)
+    weights = df["TrendWeight"].to_numpy()
+    cal_in = df["TrendCaloriesIn"].to_numpy()
 
     # --- Rule 1: unsafe low intake ---------------------------------------
-    if (df["TrendCaloriesIn"].tail(7) < SAFE_MIN_CALORIES).any():
-        alerts.append((
+    if (cal_in[-7:] < SAFE_MIN_CALORIES).any():
+        alerts[0] = (
             "UnsafeIntake",
             f"At least one day in the last week is below "
             f"{SAFE_MIN_CALORIES} kcal intake."
-        ))
+        )
 
     # --- Rule 2: rapid weight loss / gain --------------------------------
-    wt_delta = _weekly_weight_change(df)
+    wt_delta = _weekly_weight_change(weights[-7:])
     if wt_delta < -SAFE_MAX_WEIGHT_LOSS_RATE:
-        alerts.append((
+        alerts[1] = (
             "RapidLoss",
             f"Weight is dropping {abs(wt_delta):.1f} kg/week "
             f"(>{SAFE_MAX_WEIGHT_LOSS_RATE} kg safety limit)."
-        ))
-    if wt_delta >  SAFE_MAX_WEIGHT_GAIN_RATE:
-        alerts.append((
+        )
+    elif wt_delta >  SAFE_MAX_WEIGHT_GAIN_RATE:
+        alerts[1] = (
             "RapidGain",
             f"Weight is climbing {wt_delta:.1f} kg/week "
             f"(>{SAFE_MAX_WEIGHT_GAIN_RATE} kg safety limit)."
-        ))
+        )
 
     # --- Rule 3: RMR sanity check ----------------------------------------
-    latest_rmr = df["RMR"].iloc[-1] if "RMR" in df.columns else None
+    latest_rmr = df["RMR"].to_numpy()[-1] if "RMR" in df.columns else None
     if latest_rmr is not None and latest_rmr < RMR_FLOOR:
-        alerts.append((
+        alerts[2] = (
             "LowRMR",
             f"Calculated RMR ({latest_rmr:.0f} kcal) is below "
             f"physiological floor ({RMR_FLOOR})."
-        ))
+        )
 
     # --- Rule 4: goal feasibility (simple heuristic) ---------------------
     if goal:
         goal_wt   = goal["weight_kg"]
         goal_date = pd.to_datetime(goal["date"])
 
-        horizon_wt = df["TrendWeight"].iloc[-1]              # today
-        # crude linear projection: last-30-day change
-        last30 = df.sort_values("date").tail(30)
+        horizon_wt = weights[-1]                             # today
+        # linear projection over the last 30 days
+        last30 = weights[-30:]
         if len(last30) >= 2:
-            trend_30 = ( last30["TrendWeight"].iloc[-1]
-                        - last30["TrendWeight"].iloc[0] ) / 30.0
+            trend_30 = _daily_trend(df["date"].to_numpy()[-30:], last30)
             days_left = (goal_date - df["date"].iloc[-1]).days
             proj_wt   = horizon_wt + trend_30 * days_left
             if proj_wt > goal_wt:
-                alerts.append((
+                alerts[3] = (
                     "GoalNotReachable",
                     f"Linear trend projects {proj_wt:.1f} kg by target date "
                     f"(goal is {goal_wt:.1f} kg). Consider revising plan."
-                ))
+                )
 
-    return alerts
\ No newline at end of file
+    return [alert for alert in alerts if alert is not None]
\ No newline at end of file
@@ -0,0 +1,181 @@
+import os
+import sys
+
+import pytest
+from lxml import etree as ET
+
+# Ensure src is in the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.parse import sharding
+from src.parse.sharding import shard_ranges, ShardReader
+
+HEADER = (
+    '<?xml version="1.0" encoding="UTF-8"?>\n'
+    '<HealthData locale="en_US">\n'
+    ' <ExportDate value="2024-01-01 00:00:00 -0800"/>\n'
+)
+FOOTER = '</HealthData>\n'
+
+
+def _record(i: int) -> str:
+    return (
+        f' <Record type="HKQuantityTypeIdentifierBodyMass" sourceName="Scale" unit="kg" '
+        f'startDate="2024-01-{i % 28 + 1:02d} 08:00:00 -0800" value="{70 + i / 10:.1f}"/>\n'
+    )
+
+
+def _correlation(i: int) -> str:
+    # a food correlation holding two nested records, as in real exports
+    return (
+        f' <Correlation type="HKCorrelationTypeIdentifierFood" startDate="2024-02-{i % 28 + 1:02d}">\n'
+        f'  <MetadataEntry key="HKFoodType" value="Meal {i}"/>\n'
+        f' {_record(10_000 + 2 * i)}'
+        f' {_record(10_001 + 2 * i)}'
+        f' </Correlation>\n'
+    )
+
+
+def _write_export(path, body: str) -> str:
+    path.write_text(HEADER + body + FOOTER, encoding="utf-8")
+    return str(path)
+
+
+def _records(source) -> list:
+    """Attributes of every <Record>, nested ones included, in document order."""
+    out = []
+    for _, elem in ET.iterparse(source, events=("end",), tag="Record"):
+        out.append(dict(elem.attrib))
+        elem.clear()
+    return out
+
+
+def _sharded_records(path: str, n: int) -> list:
+    out = []
+    for start, end in shard_ranges(path, n):
+        with ShardReader(path, start, end) as reader:
+            out.extend(_records(reader))
+    return out
+
+
+def _correlation_spans(path: str) -> list:
+    data = open(path, "rb").read()
+    spans, pos = [], 0
+    while (start := data.find(b"<Correlation", pos)) >= 0:
+        pos = data.index(b"</Correlation>", start) + len(b"</Correlation>")
+        spans.append((start, pos))
+    return spans
+
+
+@pytest.fixture
+def mixed_export(tmp_path):
+    """Plain records interleaved with correlations that nest records."""
+    body = "".join(_correlation(i) if i % 3 == 0 else _record(i) for i in range(60))
+    return _write_export(tmp_path / "export.xml", body)
+
+
+@pytest.mark.parametrize("n", [2, 4, 6, 7, 13])
+def test_shards_match_serial_parse(mixed_export, n):
+    ranges = shard_ranges(mixed_export, n)
+
+    assert 1 < len(ranges) <= n
+    assert ranges[0][0] == 0
+    assert ranges[-1][1] == os.path.getsize(mixed_export)
+    assert all(a_end == b_start for (_, a_end), (b_start, _) in zip(ranges, ranges[1:]))
+    assert _sharded_records(mixed_export, n) == _records(mixed_export)
+
+
+@pytest.mark.parametrize("n", range(2, 40))
+def test_boundaries_never_split_a_correlation(mixed_export, n):
+    spans = _correlation_spans(mixed_export)
+    data = open(mixed_export, "rb").read()
+
+    for start, _ in shard_ranges(mixed_export, n)[1:]:
+        assert data.startswith(b"<Record ", start)
+        assert not any(c_start < start < c_end for c_start, c_end in spans)
+
+
+def test_split_target_inside_a_correlation(tmp_path):
+    # one correlation padded to cover most of the file, then plain records
+    padding = "".join(f'  <MetadataEntry key="k{i}" value="v{i}"/>\n' for i in range(200))
+    big = _correlation(0).replace("</Correlation>", padding + " </Correlation>")
+    path = _write_export(tmp_path / "export.xml", big + _record(1) + _record(2))
+    data = open(path, "rb").read()
+    after = data.index(b"</Correlation>") + len(b"</Correlation>")
+    assert after > len(data) // 2
+
+    # the midpoint falls inside the correlation, so the split moves past it
+    (_, end), (start, _) = shard_ranges(path, 2)
+    assert end == start == data.index(b"<Record ", after)
+    assert _sharded_records(path, 2) == _records(path)
+
+
+def test_correlation_longer_than_a_scan_block(tmp_path, monkeypatch):
+    # records nested far past the open tag must still count as inside it
+    monkeypatch.setattr(sharding, "_SCAN_BLOCK", 4096)
+    padding = "".join(f'  <MetadataEntry key="k{i}" value="v{i}"/>\n' for i in range(2000))
+    long = _correlation(0).replace("  <MetadataEntry", padding + "  <MetadataEntry", 1)
+    long = long.replace(" </Correlation>", "".join(_record(20_000 + i) for i in range(50)) + " </Correlation>")
+    body = _record(1) + long + _record(2) + _correlation(3) + _record(4)
+    path = _write_export(tmp_path / "export.xml", body)
+    spans = _correlation_spans(path)
+    assert spans[0][1] - spans[0][0] > 16 * 4096
+
+    for n in range(2, 12):
+        for start, _ in shard_ranges(path, n)[1:]:
+            assert not any(c_start < start < c_end for c_start, c_end in spans)
+        assert _sharded_records(path, n) == _records(path)
+
+
+def test_record_right_after_a_correlation(tmp_path):
+    body = _correlation(0).rstrip("\n") + _record(1).lstrip() + _correlation(2) + _record(3)
+    path = _write_export(tmp_path / "export.xml", body)
+    data = open(path, "rb").read()
+    adjacent = data.index(b"</Correlation>") + len(b"</Correlation>")
+    assert data.startswith(b"<Record ", adjacent)
+
+    for n in range(2, 12):
+        starts = [start for start, _ in shard_ranges(path, n)[1:]]
+        assert all(data.startswith(b"<Record ", start) for start in starts)
+        assert _sharded_records(path, n) == _records(path)
+
+
+def test_export_that_is_one_correlation(tmp_path):
+    path = _write_export(tmp_path / "export.xml", _correlation(0))
+
+    # the only records are nested, so there is nowhere to split
+    assert shard_ranges(path, 4) == [(0, os.path.getsize(path))]
+    assert _sharded_records(path, 4) == _records(path)
+
+
+def test_single_record_export(tmp_path):
+    path = _write_export(tmp_path / "export.xml", _record(0))
+    ranges = shard_ranges(path, 8)
+
+    assert len(ranges) <= 2
+    assert _sharded_records(path, 8) == _records(path)
+    assert len(_records(path)) == 1
+
+
+def test_more_shards_than_records(tmp_path):
+    path = _write_export(tmp_path / "export.xml", "".join(_record(i) for i in range(5)))
+    ranges = shard_ranges(path, 50)
+
+    assert len(ranges) <= 6
+    assert len(set(ranges)) == len(ranges)
+    assert all(start < end for start, end in ranges)
+    assert _sharded_records(path, 50) == _records(path)
+
+
+def test_shard_reader_wraps_only_inner_shards(tmp_path):
+    path = _write_export(tmp_path / "export.xml", "".join(_record(i) for i in range(3)))
+    size = os.path.getsize(path)
+    (_, mid), (mid2, _) = shard_ranges(path, 2)
+
+    with ShardReader(path, 0, size) as reader:
+        assert reader.read() == open(path, "rb").read()
+    with ShardReader(path, mid2, size) as reader:
+        assert reader.read().startswith(b"<HealthData>")
+    with ShardReader(path, 0, mid) as reader:
+        chunks = iter(lambda: reader.read(7), b"")
+        assert b"".join(chunks).endswith(b"</HealthData>")
@@ -0,0 +1,87 @@
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+# Ensure src is in the Python path
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from src.watchdog.rules import (
+    batch_alert_messages,
+    min_calorie_rule,
+    rapid_loss_rule,
+    rapid_gain_rule,
+    rmr_floor_rule,
+    deficit_no_loss_rule,
+    plateau_adaptation_rule,
+    run_rules_batch,
+)
+
+# per-week rules, in the order run_rules_batch reports their flag columns
+PER_WEEK_RULES = [
+    min_calorie_rule,
+    rapid_loss_rule,
+    rapid_gain_rule,
+    rmr_floor_rule,
+    deficit_no_loss_rule,
+    plateau_adaptation_rule,
+]
+
+
+def _random_weeks(n: int = 500, seed: int = 0) -> pd.DataFrame:
+    """Weekly windows spread across every threshold, with a few missing values."""
+    rng = np.random.default_rng(seed)
+    weekly = pd.DataFrame({
+        "week_end_date": pd.date_range("2024-01-07", periods=n, freq="7D"),
+        "mean_cal_in":   rng.uniform(800, 3000, n),
+        "mean_net_cal":  rng.uniform(-1500, 800, n),
+        "wt_change":     rng.uniform(-3.0, 3.0, n),
+        "rmr":           rng.uniform(700, 2200, n),
+        "adaptation":    rng.uniform(0.0, 0.3, n),
+    })
+    weekly.loc[::37, "wt_change"] = np.nan
+    weekly.loc[::53, "mean_cal_in"] = np.nan
+    return weekly
+
+
+def _scalar_alerts(weekly: pd.DataFrame) -> list:
+    """(week_end_date, code, message) from the per-week rule functions, week by week."""
+    alerts = []
+    for week in weekly.itertuples(index=False):
+        for rule in PER_WEEK_RULES:
+            out = rule(week, weekly)
+            if out is not None:
+                alerts.append((week.week_end_date, *out))
+    return alerts
+
+
+def test_batch_flags_match_scalar_rules():
+    weekly = _random_weeks()
+    flags = run_rules_batch(weekly)
+
+    assert flags.index.equals(weekly.index)
+    assert all(dtype == bool for dtype in flags.dtypes)
+
+    expected = [
+        [code for code, _ in filter(None, (rule(week, weekly) for rule in PER_WEEK_RULES))]
+        for week in weekly.itertuples(index=False)
+    ]
+    actual = [list(flags.columns[row]) for row in flags.to_numpy()]
+    assert actual == expected
+
+
+def test_batch_messages_match_scalar_rules():
+    weekly = _random_weeks(seed=1)
+    alerts = batch_alert_messages(weekly, run_rules_batch(weekly))
+
+    assert alerts
+    assert alerts == _scalar_alerts(weekly)
+
+
+def test_batch_on_empty_window():
+    weekly = _random_weeks().iloc[:0]
+    flags = run_rules_batch(weekly)
+
+    assert flags.empty
+    assert batch_alert_messages(weekly, flags) == []